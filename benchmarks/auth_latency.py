@@ -0,0 +1,85 @@
+# Copyright 2019 by Kirill Kanin.
+# All rights reserved.
+
+import argparse
+import statistics
+import time
+import typing
+from server.database import DataBase, backends
+from server.users import UsersAPI
+from server.session_cache import SessionCache
+
+iterations = 1000
+test_email = 'bench@test.com'
+test_password = 'bench1234'
+
+
+def commandline_parser() -> argparse.ArgumentParser:
+    """Command line parser.
+
+    Parse backends and iterations parameters from command line.
+
+    """
+
+    pass
+
+
+def prepare_backend(backend: str) -> str:
+    """Initialize database of backend and sign in test user.
+
+    Args:
+        backend (str): Backend name: postgresql or sqlite.
+
+    Returns:
+        Str with session UUID of test user.
+
+    """
+
+    pass
+
+
+def measure_auth(session_id: str, count: int = iterations) -> typing.List[float]:
+    """Measure latency of authorization check.
+
+    Session cache is cleared before each check, so every check queries database backend and not cache.
+
+    Args:
+        session_id (str): session UUID,
+        count (int): Quantity of checks.
+
+    Returns:
+        List of latencies in seconds.
+
+    """
+
+    pass
+
+
+def report(backend: str, latencies: typing.List[float]):
+    """Print p50, p95, p99 and mean latencies of backend.
+
+    Args:
+        backend (str): Backend name,
+        latencies (list): List of latencies in seconds.
+
+    """
+
+    pass
+
+
+def main():
+    """Entry point of benchmark.
+
+    Compare latency of authorization path between storage backends.
+    Command line options:
+    -b --backend - backend for measuring, can be repeated (default: all backends).
+    -n --iterations - quantity of checks (default: 1000).
+    -h --help - help.
+
+    """
+
+    pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+# Copyright 2019 by Kirill Kanin.
+# All rights reserved.
+
+import argparse
+import os
+import tempfile
+import time
+import typing
+from server.file_loader import BaseLoader
+from server.file_service import FileService
+
+file_sizes = (1024 * 1024, 64 * 1024 * 1024, 512 * 1024 * 1024)
+repeats = 5
+
+
+def commandline_parser() -> argparse.ArgumentParser:
+    """Command line parser.
+
+    Parse folder, sizes and repeats parameters from command line.
+
+    """
+
+    pass
+
+
+def create_file(path: str, size: int) -> str:
+    """Create test file with low security level.
+
+    Args:
+        path (str): Working directory path,
+        size (int): Size of file in bytes.
+
+    Returns:
+        Str with filename without .txt file extension.
+
+    """
+
+    pass
+
+
+def measure(copy: typing.Callable[[str, str], int], src_path: str, dst_folder: str, count: int = repeats) -> float:
+    """Measure throughput of copy method.
+
+    Args:
+        copy (function): Copy method, which takes source path and destination path,
+        src_path (str): Path of source file,
+        dst_folder (str): Destination folder,
+        count (int): Quantity of repeats.
+
+    Returns:
+        Float with median throughput in MB/s.
+
+    """
+
+    pass
+
+
+def copy_via_file_data(src_path: str, dst_path: str) -> int:
+    """Copy file via FileService.get_file_data. Previous download path.
+
+    Args:
+        src_path (str): Path of source file,
+        dst_path (str): Path of destination file.
+
+    Returns:
+        Int with quantity of copied bytes.
+
+    """
+
+    pass
+
+
+def copy_via_kernel(src_path: str, dst_path: str) -> int:
+    """Copy file via BaseLoader.copy_plain_file.
+
+    Args:
+        src_path (str): Path of source file,
+        dst_path (str): Path of destination file.
+
+    Returns:
+        Int with quantity of copied bytes.
+
+    """
+
+    pass
+
+
+def main():
+    """Entry point of benchmark.
+
+    Compare throughput of kernel-side copy with copy via FileService.get_file_data.
+    Command line options:
+    -f --folder - folder for test files (default: temporary folder).
+    -s --size - size of test file in bytes, can be repeated (default: 1 MB, 64 MB and 512 MB).
+    -n --repeats - quantity of repeats (default: 5).
+    -h --help - help.
+
+    """
+
+    pass
+
+
+if __name__ == '__main__':
+    main()
@@ -10,13 +10,16 @@ from aiohttp import web
 from server.handler import Handler
 #from server.database import DataBase
 from server.file_service import FileService, FileServiceSigned
+from server.crypto import CryptoEngine, RSAKeyPool
+from server.session_reaper import SessionReaper
+from server.db_session import db_session_middleware
 import server.file_service_no_class as FileServiceNoClass
 
 
 def commandline_parser() -> argparse.ArgumentParser:
     """Command line parser.
 
-    Parse port and working directory parameters from command line.
+    Parse port, working directory and crypto workers parameters from command line.
 
     """
 
@@ -105,11 +108,15 @@ def change_dir(path):
 def main():
     """Entry point of app.
 
-    Get and parse command line parameters and configure web app.
+    Get and parse command line parameters and configure web app with database session middleware. Database
+    migrations are applied, permission matrix of role model is built, session reaper and refill of RSA key pool are
+    started and pending download jobs are replayed on startup. Session reaper is stored in app['session_reaper'], so
+    handler gets statistics of its last pass from request.app. In-flight downloads are drained on shutdown.
     Command line options:
     -p --port - port (default: 8080).
     -f --folder - working directory (absolute or relative path, default: current app folder FileServer).
-    -i --init - initialize database.
+    -i --init - initialize database and apply migrations.
+    -w --crypto-workers - quantity of crypto worker processes (default: CRYPTO_WORKERS).
     -h --help - help.
 
     """
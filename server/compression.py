@@ -0,0 +1,91 @@
+# Copyright 2019 by Kirill Kanin.
+# All rights reserved.
+
+import os
+import zlib
+import lzma
+
+compression_min_size = int(os.environ['COMPRESSION_MIN_SIZE'])
+compression_sample_size = int(os.environ['COMPRESSION_SAMPLE_SIZE'])
+compression_min_ratio = float(os.environ['COMPRESSION_MIN_RATIO'])
+codecs = ('none', 'zlib', 'lzma')
+
+
+class CompressionAPI:
+    """Class with static methods for compressing chunks of encrypted files.
+
+    Chunks of container are compressed one by one before encrypting and codec is recorded in container header.
+    Files with low security level are never compressed, so they are sent and copied as is.
+
+    """
+
+    @staticmethod
+    def estimate_ratio(data: bytes, sample_size: int = compression_sample_size) -> float:
+        """Estimate compression ratio of data.
+
+        Samples from beginning, middle and end of data are compressed with fast zlib level.
+
+        Args:
+            data (bytes): Input data,
+            sample_size (int): Total size of samples in bytes.
+
+        Returns:
+            Float with estimated ratio of original size to compressed size.
+
+        """
+
+        pass
+
+    @staticmethod
+    def choose_codec(data: bytes, security_level: str) -> str:
+        """Choose codec for chunks of file.
+
+        Data with low security level, data smaller than COMPRESSION_MIN_SIZE or with estimated ratio lower than
+        COMPRESSION_MIN_RATIO is not compressed. Highly compressible data is compressed with lzma, other data with zlib.
+
+        Args:
+            data (bytes): Input data or its beginning,
+            security_level (str): String with security level.
+
+        Returns:
+            Str with codec name: none, zlib or lzma.
+
+        """
+
+        pass
+
+    @staticmethod
+    def compress(chunk: bytes, codec: str) -> bytes:
+        """Compress chunk.
+
+        Args:
+            chunk (bytes): Chunk of logical content,
+            codec (str): Codec name: none, zlib or lzma.
+
+        Returns:
+            Bytes with compressed chunk.
+
+        Raises:
+            ValueError: if codec is not supported.
+
+        """
+
+        pass
+
+    @staticmethod
+    def decompress(chunk: bytes, codec: str) -> bytes:
+        """Decompress chunk.
+
+        Args:
+            chunk (bytes): Compressed chunk,
+            codec (str): Codec name: none, zlib or lzma.
+
+        Returns:
+            Bytes with chunk of logical content.
+
+        Raises:
+            ValueError: if codec is not supported, chunk is damaged.
+
+        """
+
+        pass
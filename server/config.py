@@ -3,12 +3,48 @@
 
 import os
 
+os.environ['DB_BACKEND'] = 'postgresql'
 os.environ['DB_NAME'] = 'FileServer'
 os.environ['DB_HOST'] = 'localhost'
 os.environ['DB_USER'] = 'lucid'
 os.environ['DB_PASSWORD'] = 'lynx'
+os.environ['DB_SQLITE_PATH'] = '../FileServer.sqlite3'
 os.environ['SESSION_DURATION_HOURS'] = '1'
 os.environ['ADMIN_PASSWORD'] = 'admin1234'
 os.environ['KEY_DIR'] = '../keys'
 os.environ['DATE_FORMAT'] = '%Y-%m-%d %H:%M:%S'
 os.environ['CRYPTO_CODE'] = '0101d08d-5c8e-4265-b2c3-b884d02b0cb4'
+os.environ['KEY_CACHE_SIZE'] = '128'
+os.environ['CRYPTO_WORKERS'] = '2'
+os.environ['CRYPTO_INLINE_LIMIT'] = '65536'
+os.environ['CRYPTO_PROCESS_LIMIT'] = '4194304'
+os.environ['CRYPTO_QUEUE_SIZE'] = '64'
+os.environ['SIGNATURE_ALGORITHM'] = 'blake2b'
+os.environ['SIGNATURE_CACHE_SIZE'] = '4096'
+os.environ['SCRUB_WORKERS'] = '4'
+os.environ['SCRUB_RATE_LIMIT'] = '10485760'
+os.environ['DEDUP_STORAGE'] = 'false'
+os.environ['BLOB_KEY_SECRET'] = '5d0c2a7e-93f1-4b6a-8e2d-1f7c9b4a6e30'
+os.environ['BLOB_LOG_COMPACT_RATIO'] = '2'
+os.environ['COMPRESSION_MIN_SIZE'] = '512'
+os.environ['COMPRESSION_SAMPLE_SIZE'] = '16384'
+os.environ['COMPRESSION_MIN_RATIO'] = '1.2'
+os.environ['SESSION_CACHE_SIZE'] = '10000'
+os.environ['DB_POOL_MIN_SIZE'] = '2'
+os.environ['DB_POOL_MAX_SIZE'] = '20'
+os.environ['DB_POOL_TIMEOUT'] = '5'
+os.environ['DB_STATEMENT_TIMEOUT_MS'] = '5000'
+os.environ['SESSION_REAPER_INTERVAL'] = '300'
+os.environ['SESSION_REAPER_BATCH_SIZE'] = '1000'
+os.environ['DB_EXECUTOR_WORKERS'] = '8'
+os.environ['RSA_KEY_BITS'] = '2048'
+os.environ['RSA_KEY_POOL_SIZE'] = '16'
+os.environ['RSA_KEY_POOL_WORKERS'] = '2'
+os.environ['LOADER_WORKERS'] = '4'
+os.environ['LOADER_QUEUE_SIZE'] = '1000'
+os.environ['LOADER_AGING_RATE'] = '1048576'
+os.environ['LOADER_JOB_TTL'] = '3600'
+os.environ['LOADER_JOURNAL_PATH'] = '../loader_jobs.sqlite3'
+os.environ['LOADER_SHUTDOWN_TIMEOUT'] = '30'
+os.environ['BATCH_CONCURRENCY'] = '16'
+os.environ['BATCH_MAX_SIZE'] = '10000'
@@ -2,13 +2,36 @@
 # All rights reserved.
 
 import os
+import asyncio
 import hashlib
+import mmap
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from threading import Lock
 from Crypto.PublicKey import RSA
 from Crypto.Cipher import AES, PKCS1_OAEP
 from Crypto.Random import get_random_bytes
-from typing import Tuple, BinaryIO
+from typing import Tuple, BinaryIO, Iterator, Callable, Any
+from server.utils import SingletonMeta
+from server.compression import CompressionAPI
 
 key_folder = os.environ['KEY_DIR']
+key_cache_size = int(os.environ['KEY_CACHE_SIZE'])
+crypto_workers = int(os.environ['CRYPTO_WORKERS'])
+crypto_inline_limit = int(os.environ['CRYPTO_INLINE_LIMIT'])
+crypto_process_limit = int(os.environ['CRYPTO_PROCESS_LIMIT'])
+crypto_queue_size = int(os.environ['CRYPTO_QUEUE_SIZE'])
+signature_algorithm = os.environ['SIGNATURE_ALGORITHM']
+signature_version = 2
+hash_algorithms = ('md5', 'sha512', 'blake2b')
+hash_chunk_size = 1024 * 1024
+rsa_key_bits = int(os.environ['RSA_KEY_BITS'])
+rsa_key_pool_size = int(os.environ['RSA_KEY_POOL_SIZE'])
+rsa_key_pool_workers = int(os.environ['RSA_KEY_POOL_WORKERS'])
+key_pool_folder = os.path.join(key_folder, 'pool')
+container_magic = b'FSAE'
+container_version = 2
+chunk_size = 64 * 1024
 
 
 class HashAPI:
@@ -50,6 +73,277 @@ class HashAPI:
 
         pass
 
+    @staticmethod
+    def hash_blake2b(input_str: str) -> str:
+        """Generate hash BLAKE2b.
+
+        Args:
+            input_str (str): Input string.
+
+        Returns:
+            Str with hash in hex format.
+
+        Raises:
+            AssertionError: if input string is not set.
+
+        """
+
+        pass
+
+    @staticmethod
+    def hmac_blake2b(data: bytes, key: str) -> str:
+        """Generate keyed hash BLAKE2b, which is used as HMAC.
+
+        Args:
+            data (bytes): Input data,
+            key (str): Secret key, up to 64 bytes in UTF-8.
+
+        Returns:
+            Str with keyed hash in hex format.
+
+        Raises:
+            AssertionError: if key is not set or too long.
+
+        """
+
+        pass
+
+    @staticmethod
+    def hash_file(
+            path: str, algorithm: str = signature_algorithm, on_chunk: Callable[[int], None] = None) -> str:
+        """Generate hash of file without reading whole content into memory.
+
+        File is hashed via mmap in slices of hash_chunk_size bytes. Empty files and files, which can not be mapped, are
+        hashed in loop of readinto with reusable buffer of the same size. Callback is called with size of each chunk
+        before it is hashed, so caller can throttle reading.
+
+        Args:
+            path (str): Path to file,
+            algorithm (str): Hash algorithm: md5, sha512 or blake2b,
+            on_chunk (function): Callback, which takes size of chunk in bytes. Optional.
+
+        Returns:
+            Str with hash in hex format.
+
+        Raises:
+            AssertionError: if file does not exist,
+            ValueError: if algorithm is not supported.
+
+        """
+
+        pass
+
+    @staticmethod
+    def format_signature(digest: str, algorithm: str = signature_algorithm) -> str:
+        """Format content of signature file.
+
+        Args:
+            digest (str): Hash in hex format,
+            algorithm (str): Hash algorithm: md5, sha512 or blake2b.
+
+        Returns:
+            Str with signature format version, algorithm and hash.
+
+        Raises:
+            ValueError: if algorithm is not supported.
+
+        """
+
+        pass
+
+    @staticmethod
+    def parse_signature(signature: str) -> Tuple[int, str, str]:
+        """Parse content of signature file.
+
+        Signature files without version are treated as version 1 with MD5 hash.
+
+        Args:
+            signature (str): Content of signature file.
+
+        Returns:
+            Tuple with signature format version, algorithm and hash in hex format.
+
+        Raises:
+            ValueError: if signature format is invalid or not supported.
+
+        """
+
+        pass
+
+
+class RSAKeyCache(metaclass=SingletonMeta):
+    """Singleton class with bounded LRU cache of imported RSA keys and ciphers.
+
+    Entries are keyed by user Id and invalidated when mtime of user's key file is changed.
+
+    """
+
+    def __init__(self):
+        pass
+
+    @property
+    def hits(self) -> int:
+        """Quantity of cache hits getter.
+
+        Returns:
+            Int with quantity of cache hits.
+
+        """
+
+        pass
+
+    @property
+    def misses(self) -> int:
+        """Quantity of cache misses getter.
+
+        Returns:
+            Int with quantity of cache misses.
+
+        """
+
+        pass
+
+    def get(self, user_id: int) -> Tuple[RSA.RsaKey, PKCS1_OAEP.PKCS1OAEP_Cipher]:
+        """Get imported RSA key and cipher of user.
+
+        Key is loaded from key file if it is not cached or key file is changed. If key file does not exist, key is
+        assigned from RSA key pool. If assignment loses race with another thread or process, key file created by winner
+        is loaded. The least recently used entry is evicted if cache is full.
+
+        Args:
+            user_id (int): User Id.
+
+        Returns:
+            Tuple with RSA key and PKCS1 OAEP cipher.
+
+        """
+
+        pass
+
+    def invalidate(self, user_id: int):
+        """Remove user's entry from cache.
+
+        Args:
+            user_id (int): User Id.
+
+        """
+
+        pass
+
+    def clear(self):
+        """Remove all entries from cache and reset counters.
+
+        """
+
+        pass
+
+
+def generate_key_pair(bits: int = rsa_key_bits) -> bytes:
+    """Generate RSA key pair for key pool.
+
+    Generation takes hundreds of milliseconds of CPU, so key pool runs it in worker processes off request path. Only
+    exported key is returned, because key objects are not sent between processes.
+
+    Args:
+        bits (int): Key length in bits. Default: RSA_KEY_BITS.
+
+    Returns:
+        Bytes with private key in PEM format.
+
+    """
+
+    pass
+
+
+class RSAKeyPool(metaclass=SingletonMeta):
+    """Singleton class with pool of pre-generated RSA key pairs.
+
+    Key pairs are generated in process pool and saved into pool folder of KEY_DIR, so pool survives restarts. Key is
+    assigned to user by hard link of key file from pool folder into user's key file and unlink of pool file. Link
+    never replaces existing file, so concurrent assignments from signup, crypto engine threads and worker processes
+    can not overwrite key, which is already in use. If pool is empty, key is generated on the spot and saved the same
+    way.
+
+    """
+
+    def __init__(self):
+        pass
+
+    def configure(self, size: int = rsa_key_pool_size, workers: int = rsa_key_pool_workers):
+        """Configure pool.
+
+        Args:
+            size (int): Quantity of ready key pairs, which pool keeps,
+            workers (int): Quantity of worker processes.
+
+        Raises:
+            AssertionError: if at least one of parameters is not positive.
+
+        """
+
+        pass
+
+    @property
+    def available(self) -> int:
+        """Quantity of ready key pairs getter.
+
+        Returns:
+            Int with quantity of key files in pool folder.
+
+        """
+
+        pass
+
+    def save_key(self, key: bytes) -> str:
+        """Save generated key into pool folder atomically.
+
+        Args:
+            key (bytes): Private key in PEM format.
+
+        Returns:
+            Str with path of key file.
+
+        """
+
+        pass
+
+    def assign(self, user_id: int) -> bool:
+        """Assign key pair from pool to user.
+
+        Pool file is linked into user's key file via os.link and then unlinked. If user's key file already exists,
+        FileExistsError of os.link is caught and pool file stays in pool, so existing key is never overwritten.
+
+        Args:
+            user_id (int): User Id.
+
+        Returns:
+            True if key is assigned, False if user already has key file.
+
+        """
+
+        pass
+
+    async def fill(self):
+        """Generate key pairs in process pool until pool is full.
+
+        """
+
+        pass
+
+    async def run(self):
+        """Refill pool after each assignment until task is cancelled.
+
+        """
+
+        pass
+
+    def shutdown(self):
+        """Stop refill and shutdown process pool.
+
+        """
+
+        pass
+
 
 class BaseCipher:
     """Base cipher class.
@@ -93,6 +387,33 @@ class BaseCipher:
 
         pass
 
+    def encrypt_stream(self, input_file: BinaryIO, out_file: BinaryIO) -> Iterator[int]:
+        """Encrypt data from input file chunk by chunk and write it into output file.
+
+        Args:
+            input_file (BinaryIO): Input file with data for encrypting,
+            out_file(BinaryIO): Output file.
+
+        Returns:
+            Iterator of quantities of bytes written for each chunk.
+
+        """
+
+        pass
+
+    def decrypt_stream(self, input_file: BinaryIO) -> Iterator[memoryview]:
+        """Decrypt data from input file chunk by chunk.
+
+        Args:
+            input_file (BinaryIO): Input file with data for decrypting.
+
+        Returns:
+            Iterator of memoryviews with decrypted chunks. Memoryview is valid until next chunk is requested.
+
+        """
+
+        pass
+
 
 class AESCipher(BaseCipher):
     """AES cipher class.
@@ -118,6 +439,8 @@ class AESCipher(BaseCipher):
     def decrypt(self, input_file: BinaryIO) -> bytes:
         """Decrypt data.
 
+        Both chunked container format and single-shot format are supported.
+
         Args:
             input_file (BinaryIO): Input file with data for decrypting.
 
@@ -148,6 +471,8 @@ class AESCipher(BaseCipher):
     def write_cipher_text(self, data: bytes, out_file: BinaryIO):
         """Encrypt data and write cipher text into output file.
 
+        Data is written in chunked container format.
+
         Args:
             data (bytes): Encrypted data,
             out_file(BinaryIO): Output file.
@@ -156,10 +481,140 @@ class AESCipher(BaseCipher):
 
         pass
 
+    @staticmethod
+    def is_chunked(input_file: BinaryIO) -> bool:
+        """Check whether input file is stored in chunked container format.
+
+        Position of input file is not changed.
+
+        Args:
+            input_file (BinaryIO): Input file with encrypted data.
+
+        Returns:
+            True if file starts with container header, False for single-shot format.
+
+        """
+
+        pass
+
+    def write_header(
+            self, out_file: BinaryIO, session_key: bytes, nonce_prefix: bytes, codec: str = 'none', size: int = 0):
+        """Write container header into output file.
+
+        Header contains magic bytes, format version, chunk size, compression codec, logical size of content, nonce
+        prefix and session key. Logical size is rewritten in place after the last chunk is written.
+
+        Args:
+            out_file(BinaryIO): Output file,
+            session_key (bytes): AES session key,
+            nonce_prefix (bytes): Prefix of chunk nonces,
+            codec (str): Compression codec of chunks: none, zlib or lzma. Default: none,
+            size (int): Logical size of content in bytes. Default: 0.
+
+        """
+
+        pass
+
+    def read_header(self, input_file: BinaryIO) -> Tuple[int, str, int, bytes, bytes]:
+        """Read container header from input file.
+
+        Args:
+            input_file (BinaryIO): Input file with encrypted data.
+
+        Returns:
+            Tuple with chunk size, compression codec, logical size of content, nonce prefix and session key.
+
+        Raises:
+            ValueError: if header is invalid or format version is not supported.
+
+        """
+
+        pass
+
+    @staticmethod
+    def get_logical_size(input_file: BinaryIO) -> int:
+        """Get logical size of content from container header without decrypting.
+
+        Args:
+            input_file (BinaryIO): Input file with encrypted data.
+
+        Returns:
+            Int with logical size of content in bytes. For single-shot format size of cipher text.
+
+        Raises:
+            ValueError: if header is invalid or format version is not supported.
+
+        """
+
+        pass
+
+    def encrypt_stream(self, input_file: BinaryIO, out_file: BinaryIO, codec: str = 'none') -> Iterator[int]:
+        """Encrypt data from input file chunk by chunk and write it into output file.
+
+        Output file gets container header and chunks, each chunk holds chunk size bytes of logical content, is
+        compressed with codec recorded in header and authenticated with own tag. Chunk is stored as frame with its
+        stored length, so frames are skipped without decrypting. Nonce of chunk is built from nonce prefix and chunk
+        number, and the last chunk is marked in associated data, so chunks can not be reordered or truncated. Input is
+        read into reusable buffer via readinto.
+
+        Args:
+            input_file (BinaryIO): Input file with data for encrypting,
+            out_file(BinaryIO): Output file,
+            codec (str): Compression codec of chunks: none, zlib or lzma. Default: none.
+
+        Returns:
+            Iterator of quantities of bytes written for each chunk.
+
+        """
+
+        pass
+
+    def decrypt_stream(self, input_file: BinaryIO) -> Iterator[memoryview]:
+        """Decrypt data from input file chunk by chunk.
+
+        Files in single-shot format are decrypted whole and returned as one chunk.
+
+        Args:
+            input_file (BinaryIO): Input file with data for decrypting.
+
+        Returns:
+            Iterator of memoryviews with decrypted chunks. Memoryview is valid until next chunk is requested.
+
+        Raises:
+            ValueError: if header is invalid or chunk tag does not match.
+
+        """
+
+        pass
+
+    def decrypt_range(self, input_file: BinaryIO, offset: int, length: int = None) -> bytes:
+        """Decrypt range of data.
+
+        For chunked container format numbers of chunks, which cover requested range, are computed from logical offsets,
+        preceding frames are skipped by their stored lengths and only covering chunks are decrypted and decompressed.
+        Files in single-shot format are decrypted whole.
+
+        Args:
+            input_file (BinaryIO): Input file with data for decrypting,
+            offset (int): Offset of range in decrypted data,
+            length (int): Length of range. Optional, all data after offset by default.
+
+        Returns:
+            Bytes with decrypted range of data.
+
+        Raises:
+            ValueError: if header is invalid, chunk tag does not match, range is invalid.
+
+        """
+
+        pass
+
 
 class RSACipher(AESCipher):
     """RSA cipher class.
 
+    User's RSA key and cipher are taken from RSAKeyCache.
+
     """
 
     def __init__(self, user_id: int):
@@ -201,3 +656,198 @@ class RSACipher(AESCipher):
         """
 
         pass
+
+    def write_header(
+            self, out_file: BinaryIO, session_key: bytes, nonce_prefix: bytes, codec: str = 'none', size: int = 0):
+        """Write container header into output file.
+
+        Session key is encrypted with user's RSA public key.
+
+        Args:
+            out_file(BinaryIO): Output file,
+            session_key (bytes): AES session key,
+            nonce_prefix (bytes): Prefix of chunk nonces,
+            codec (str): Compression codec of chunks: none, zlib or lzma. Default: none,
+            size (int): Logical size of content in bytes. Default: 0.
+
+        """
+
+        pass
+
+    def read_header(self, input_file: BinaryIO) -> Tuple[int, str, int, bytes, bytes]:
+        """Read container header from input file.
+
+        Session key is decrypted with user's RSA private key.
+
+        Args:
+            input_file (BinaryIO): Input file with encrypted data.
+
+        Returns:
+            Tuple with chunk size, compression codec, logical size of content, nonce prefix and session key.
+
+        Raises:
+            ValueError: if header is invalid or format version is not supported.
+
+        """
+
+        pass
+
+
+def encrypt_file(security_level: str, user_id: int, data: bytes, out_path: str, codec: str = 'none') -> int:
+    """Encrypt data into file with cipher of security level.
+
+    Function is used as task of crypto engine, so it can be run in another process. Data is encrypted via
+    encrypt_stream straight into output file, so cipher text is not built in memory and not sent back to caller.
+
+    Args:
+        security_level (str): String with security level: low, medium or high,
+        user_id (int): User Id,
+        data (bytes): Input data for encrypting,
+        out_path (str): Path of output file,
+        codec (str): Compression codec of chunks: none, zlib or lzma. Ignored for low security level. Default: none.
+
+    Returns:
+        Int with quantity of bytes written into output file.
+
+    Raises:
+        ValueError: if security level is invalid.
+
+    """
+
+    pass
+
+
+def decrypt_file(security_level: str, user_id: int, path: str, offset: int = 0, length: int = None) -> bytes:
+    """Decrypt file or range of its content with cipher of security level.
+
+    Function is used as task of crypto engine, so it can be run in another process. Only path and range are sent to
+    task, file is read by task itself. Range is decrypted via decrypt_range, so only chunks, which cover it, are read
+    and decrypted, whole content is collected from decrypt_stream.
+
+    Args:
+        security_level (str): String with security level: low, medium or high,
+        user_id (int): User Id,
+        path (str): Path of file,
+        offset (int): Offset of range in decrypted data. Default: 0,
+        length (int): Length of range. Optional, all data after offset by default.
+
+    Returns:
+        Bytes with decrypted data or its range. For low security level content of file is returned as is.
+
+    Raises:
+        ValueError: if security level is invalid, range is invalid.
+
+    """
+
+    pass
+
+
+class CryptoEngine(metaclass=SingletonMeta):
+    """Singleton class for running crypto tasks without blocking event loop.
+
+    Small payloads are processed inline, medium payloads in thread pool and large payloads in process pool. Quantity
+    of pending tasks is bounded, so callers wait for free slot when queue is full.
+
+    """
+
+    def __init__(self):
+        pass
+
+    def configure(
+            self, workers: int = crypto_workers, inline_limit: int = crypto_inline_limit,
+            process_limit: int = crypto_process_limit, queue_size: int = crypto_queue_size):
+        """Configure engine. Executors are recreated.
+
+        Args:
+            workers (int): Quantity of worker processes and threads,
+            inline_limit (int): Max payload size in bytes for inline processing,
+            process_limit (int): Min payload size in bytes for processing in process pool,
+            queue_size (int): Max quantity of pending tasks.
+
+        Raises:
+            AssertionError: if at least one of parameters is not positive.
+
+        """
+
+        pass
+
+    @property
+    def pending(self) -> int:
+        """Quantity of pending tasks getter.
+
+        Returns:
+            Int with quantity of pending tasks.
+
+        """
+
+        pass
+
+    async def run(self, func: Callable[..., Any], size: int, *args) -> Any:
+        """Run crypto task.
+
+        Args:
+            func (function): Picklable function for running,
+            size (int): Payload size in bytes,
+            *args (tuple): Arguments of function.
+
+        Returns:
+            Result of function.
+
+        """
+
+        pass
+
+    async def encrypt(
+            self, security_level: str, user_id: int, data: bytes, out_path: str, codec: str = 'none') -> int:
+        """Encrypt data into file via engine with encrypt_file task.
+
+        Mode of execution is chosen by size of data.
+
+        Args:
+            security_level (str): String with security level: low, medium or high,
+            user_id (int): User Id,
+            data (bytes): Input data for encrypting,
+            out_path (str): Path of output file,
+            codec (str): Compression codec of chunks: none, zlib or lzma. Ignored for low security level. Default: none.
+
+        Returns:
+            Int with quantity of bytes written into output file.
+
+        Raises:
+            ValueError: if security level is invalid.
+
+        """
+
+        pass
+
+    async def decrypt(
+            self, security_level: str, user_id: int, path: str, size: int, offset: int = 0,
+            length: int = None) -> bytes:
+        """Decrypt file or range of its content via engine with decrypt_file task.
+
+        Mode of execution is chosen by size of requested range, so previews of large files are decrypted inline.
+
+        Args:
+            security_level (str): String with security level: low, medium or high,
+            user_id (int): User Id,
+            path (str): Path of file,
+            size (int): Logical size of file content in bytes,
+            offset (int): Offset of range in decrypted data. Default: 0,
+            length (int): Length of range. Optional, all data after offset by default.
+
+        Returns:
+            Bytes with decrypted data or its range.
+
+        Raises:
+            ValueError: if security level is invalid, range is invalid.
+
+        """
+
+        pass
+
+    def shutdown(self):
+        """Shutdown executors and wait for running tasks.
+
+        """
+
+        pass
@@ -2,21 +2,95 @@
 # All rights reserved.
 
 import os
-from sqlalchemy import create_engine
+import typing
+from sqlalchemy import create_engine, event
 from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey
 from sqlalchemy.ext.declarative import declarative_base, declared_attr
 from sqlalchemy.orm import relationship, sessionmaker
 from sqlalchemy.orm.session import Session as DBSession
-from sqlalchemy.engine.base import Engine
+from sqlalchemy.engine.base import Engine, Connection
 from datetime import datetime, timedelta
 from uuid import uuid4
 from server.crypto import HashAPI
 from server.utils import SingletonMeta
 
+backends = ('postgresql', 'sqlite')
+sqlite_path = os.path.abspath(os.environ['DB_SQLITE_PATH'])
+sqlite_pragmas = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('foreign_keys', 'ON'),
+    ('busy_timeout', '5000'),
+    ('cache_size', '-65536'),
+    ('temp_store', 'MEMORY'),
+    ('mmap_size', '268435456'),
+)
+schema_version_table = 'SchemaVersion'
+
+
+class Migration:
+    """Versioned schema migration.
+
+    Checks are queries, which select rows violating precondition of migration, e.g. duplicates of values before
+    creation of unique index. Migration is not applied if any check selects rows.
+
+    """
+
+    def __init__(self, version: int, description: str, statements: tuple, checks: tuple = ()):
+        pass
+
+    def check(self, connection: Connection) -> typing.List[str]:
+        """Run checks of migration.
+
+        Args:
+            connection (Connection): Database connection in transaction.
+
+        Returns:
+            List of str with descriptions of violating rows, e.g. duplicated emails with their quantity.
+
+        """
+
+        pass
+
+    def apply(self, connection: Connection):
+        """Run checks, execute statements of migration and save its version.
+
+        Args:
+            connection (Connection): Database connection in transaction.
+
+        Raises:
+            AssertionError: if checks select violating rows, message of error lists all of them.
+
+        """
+
+        pass
+
+
+migrations = (
+    Migration(1, 'Add indexes for hot lookups', (
+        'CREATE UNIQUE INDEX IF NOT EXISTS ux_session_uuid ON "Session" (uuid)',
+        'CREATE INDEX IF NOT EXISTS ix_session_expiration_date ON "Session" (expiration_date)',
+    )),
+    Migration(2, 'Add uniqueness constraints', (
+        'CREATE UNIQUE INDEX IF NOT EXISTS ux_user_email ON "User" (email)',
+        'CREATE UNIQUE INDEX IF NOT EXISTS ux_role_name ON "Role" (name)',
+        'CREATE UNIQUE INDEX IF NOT EXISTS ux_method_name ON "Method" (name)',
+        'CREATE UNIQUE INDEX IF NOT EXISTS ux_methodrole_role_method ON "MethodRole" (role_id, method_id)',
+    ), (
+        'SELECT email, COUNT(*) FROM "User" GROUP BY email HAVING COUNT(*) > 1',
+        'SELECT name, COUNT(*) FROM "Role" GROUP BY name HAVING COUNT(*) > 1',
+        'SELECT name, COUNT(*) FROM "Method" GROUP BY name HAVING COUNT(*) > 1',
+        'SELECT role_id, method_id, COUNT(*) FROM "MethodRole" GROUP BY role_id, method_id HAVING COUNT(*) > 1',
+    )),
+)
+
 
 class DataBase(metaclass=SingletonMeta):
     """Singleton class for ORM.
 
+    Storage backend is set by DB_BACKEND: postgresql uses DB_HOST, DB_NAME, DB_USER and DB_PASSWORD, sqlite uses
+    embedded database in DB_SQLITE_PATH in WAL mode.
+
     """
 
     Base = declarative_base()
@@ -63,6 +137,8 @@ class DataBase(metaclass=SingletonMeta):
     class Session(BaseModel, Base):
         """Session model.
 
+        Expiration date column is indexed by migration 1 for reaping of expired sessions.
+
         """
 
         def __init__(self, user=None):
@@ -78,6 +154,17 @@ class DataBase(metaclass=SingletonMeta):
         def __init__(self, method=None, role=None):
             pass
 
+    @property
+    def backend(self) -> str:
+        """Storage backend getter.
+
+        Returns:
+            Str with backend name: postgresql or sqlite.
+
+        """
+
+        pass
+
     @property
     def engine(self) -> Engine:
         """Database engine getter.
@@ -89,6 +176,40 @@ class DataBase(metaclass=SingletonMeta):
 
         pass
 
+    @staticmethod
+    def build_engine(backend: str) -> Engine:
+        """Build database engine for backend.
+
+        Sqlite engine opens database in sqlite_path, which is resolved to absolute path on import, so changing of
+        working directory by FileService.change_dir does not open another database. Connections are created with
+        check_same_thread=False, since session of request is used from any thread of database executor, one call at a
+        time.
+
+        Args:
+            backend (str): Backend name: postgresql or sqlite.
+
+        Returns:
+            Database engine.
+
+        Raises:
+            ValueError: if backend is not supported.
+
+        """
+
+        pass
+
+    @staticmethod
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Set pragmas of sqlite connection. Listener of engine connect event.
+
+        Args:
+            dbapi_connection: DBAPI connection,
+            connection_record: Connection record of pool.
+
+        """
+
+        pass
+
     def create_session(self) -> DBSession:
         """Create and get database connection session.
 
@@ -100,7 +221,37 @@ class DataBase(metaclass=SingletonMeta):
         pass
 
     def init_system(self):
-        """Initialize database.
+        """Initialize database and apply migrations. Works with all storage backends.
+
+        """
+
+        pass
+
+    def get_schema_version(self) -> int:
+        """Get version of the last applied migration.
+
+        Returns:
+            Int with schema version or 0 if no migrations are applied.
+
+        """
+
+        pass
+
+    def migrate(self, target: int = None) -> int:
+        """Apply migrations, which are not applied yet.
+
+        Each migration is applied in own transaction, so failed migration does not leave schema partially changed.
+
+        Args:
+            target (int): Version of the last applied migration. Optional, the latest version by default.
+
+        Returns:
+            Int with schema version after migration.
+
+        Raises:
+            AssertionError: if target version is lower than current version or does not exist, checks of migration
+            select violating rows, e.g. duplicated emails or role names, which must be resolved manually before
+            migration.
 
         """
 
@@ -0,0 +1,81 @@
+# Copyright 2019 by Kirill Kanin.
+# All rights reserved.
+
+import os
+import asyncio
+import typing
+from concurrent.futures import ThreadPoolExecutor
+from aiohttp import web
+from sqlalchemy.orm.session import Session as DBSession
+#from server.database import DataBase
+
+db_executor_workers = int(os.environ['DB_EXECUTOR_WORKERS'])
+session_key = 'db_session'
+lock_key = 'db_session_lock'
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get bounded executor for blocking ORM calls.
+
+    Executor is created on first call with DB_EXECUTOR_WORKERS workers.
+
+    Returns:
+        Thread pool executor.
+
+    """
+
+    pass
+
+
+def get_session(request: web.Request) -> DBSession:
+    """Get database session of request.
+
+    Session is created on first call and shared by authorization decorators and handler.
+
+    Args:
+        request (Request): aiohttp request.
+
+    Returns:
+        Database connection session.
+
+    """
+
+    pass
+
+
+async def run_in_session(request: web.Request, func: typing.Callable[..., typing.Any], *args) -> typing.Any:
+    """Run blocking ORM call with database session of request in executor.
+
+    SQLAlchemy sessions are not thread safe, so calls of one request are serialized with lock of request and only one
+    call at a time uses session. Calls of different requests run concurrently.
+
+    Args:
+        request (Request): aiohttp request,
+        func (function): Function, which takes database session as first argument,
+        *args (tuple): Other arguments of function.
+
+    Returns:
+        Result of function.
+
+    """
+
+    pass
+
+
+@web.middleware
+async def db_session_middleware(request: web.Request, handler: typing.Callable) -> web.StreamResponse:
+    """Middleware, which provides one database session and its lock per request.
+
+    Session is committed once after handler if it was created and handler succeeded, rolled back if handler raised
+    exception, and closed in any case.
+
+    Args:
+        request (Request): aiohttp request,
+        handler (function): Request handler.
+
+    Returns:
+        StreamResponse: response of handler.
+
+    """
+
+    pass
@@ -2,16 +2,31 @@
 # All rights reserved.
 
 import os
+import asyncio
+import fcntl
 import logging
+import sqlite3
 import time
+import typing
 from uuid import uuid4
-from threading import Thread
-from queue import Queue
+from threading import Thread, Condition, Lock
+from queue import Queue, Full
 from pathlib import Path
 from server.file_service import FileService, FileServiceSigned
 
 logger = logging.getLogger(__name__)
 
+loader_workers = int(os.environ['LOADER_WORKERS'])
+loader_queue_size = int(os.environ['LOADER_QUEUE_SIZE'])
+loader_aging_rate = float(os.environ['LOADER_AGING_RATE'])
+loader_job_ttl = float(os.environ['LOADER_JOB_TTL'])
+job_states = ('queued', 'running', 'done', 'failed')
+loader_journal_path = os.environ['LOADER_JOURNAL_PATH']
+loader_shutdown_timeout = float(os.environ['LOADER_SHUTDOWN_TIMEOUT'])
+part_extension = 'part'
+ficlone = 0x40049409
+copy_chunk_size = 64 * 1024 * 1024
+
 
 class BaseLoader(Thread):
     """Base file loader class.
@@ -21,13 +36,20 @@ class BaseLoader(Thread):
     def __init__(self, daemon: bool = False):
         pass
 
-    def download_file(self, filename: str, is_signed: bool, user_id: int) -> str:
+    def download_file(self, filename: str, is_signed: bool, user_id: int, job_id: str = None) -> str:
         """Download file into /home/{user_name}.
 
+        Content is written into temporary file {filename}.{job_id}.part in destination folder and atomically renamed
+        into destination file, so repeated run of the same job does not leave partial or duplicated files. Files with
+        low security level are copied by kernel, encrypted files are decrypted chunk by chunk into destination file.
+        If is_signed is set, signature is verified before copying. Source path is taken from FileService.get_file_path,
+        so blob is copied for pointer files.
+
         Args:
             filename (str): file name,
             is_signed (bool): check or not file signature,
-            user_id (int): user Id.
+            user_id (int): user Id,
+            job_id (str): job UUID. Optional, random UUID by default.
 
         Returns:
             Str with success message.
@@ -41,6 +63,46 @@ class BaseLoader(Thread):
 
         pass
 
+    @staticmethod
+    def copy_plain_file(src_path: str, dst_file: typing.BinaryIO) -> int:
+        """Copy plain text file without reading content into Python.
+
+        Reflink is tried first, then os.copy_file_range and os.sendfile. Next method is used if previous one is not
+        supported by filesystem (OSError) or is not available in running Python version (AttributeError,
+        os.copy_file_range exists since Python 3.8). Signature is not checked here, download_file verifies it before
+        copying if is_signed is set.
+
+        Args:
+            src_path (str): Path of source file,
+            dst_file (BinaryIO): Destination file.
+
+        Returns:
+            Int with quantity of copied bytes.
+
+        """
+
+        pass
+
+    @staticmethod
+    def copy_encrypted_file(src_path: str, security_level: str, user_id: int, dst_file: typing.BinaryIO) -> int:
+        """Decrypt file chunk by chunk into destination file.
+
+        Args:
+            src_path (str): Path of source file,
+            security_level (str): String with security level: medium or high,
+            user_id (int): User Id,
+            dst_file (BinaryIO): Destination file.
+
+        Returns:
+            Int with quantity of written bytes.
+
+        Raises:
+            ValueError: if security level is invalid, chunk tag does not match.
+
+        """
+
+        pass
+
 
 class FileLoader(BaseLoader):
     """Not daemon thread file loader class.
@@ -58,12 +120,206 @@ class FileLoader(BaseLoader):
         pass
 
 
+class LoaderJob:
+    """Download job of queued loader.
+
+    New job gets random UUID and current enqueueing time, job restored from journal keeps stored ones.
+
+    """
+
+    __slots__ = ('job_id', 'filename', 'is_signed', 'user_id', 'size', 'enqueued', 'state', 'copied', 'error',
+                 'finished')
+
+    def __init__(
+            self, filename: str, is_signed: bool, user_id: int, size: int, job_id: str = None,
+            enqueued: float = None):
+        pass
+
+    def to_dict(self) -> typing.Dict[str, typing.Any]:
+        """Convert job into dict for response.
+
+        Returns:
+            Dict, which contains job status. Keys:
+                job_id (str): job UUID.
+                name (str): name of file with .txt extension.
+                state (str): queued, running, done or failed.
+                size (int): size of file in bytes.
+                copied (int): quantity of copied bytes.
+                error (str): error message of failed job.
+
+        """
+
+        pass
+
+
+class JobTable:
+    """Thread safe in-memory table of download jobs with TTL eviction.
+
+    Finished jobs are evicted after LOADER_JOB_TTL seconds. Waiters are woken up via asyncio futures, which are
+    resolved in their event loops when job is finished.
+
+    """
+
+    def __init__(self, ttl: float = loader_job_ttl):
+        pass
+
+    def add(self, job: LoaderJob) -> str:
+        """Add queued job into table.
+
+        Args:
+            job (LoaderJob): Download job.
+
+        Returns:
+            Str with job UUID.
+
+        """
+
+        pass
+
+    def update(self, job_id: str, state: str = None, copied: int = None, error: str = None):
+        """Update job state and progress.
+
+        If job is finished, its waiters are woken up.
+
+        Args:
+            job_id (str): job UUID,
+            state (str): queued, running, done or failed. Optional,
+            copied (int): quantity of copied bytes. Optional,
+            error (str): error message. Optional.
+
+        """
+
+        pass
+
+    def get(self, job_id: str, user_id: int = None) -> LoaderJob:
+        """Get job.
+
+        Args:
+            job_id (str): job UUID,
+            user_id (int): User Id. Optional, if set job must belong to user.
+
+        Returns:
+            Download job.
+
+        Raises:
+            AssertionError: if job is not found or belongs to another user.
+
+        """
+
+        pass
+
+    def wait(self, job_id: str, user_id: int = None) -> asyncio.Future:
+        """Get future, which is resolved with job when job is finished.
+
+        Future of finished job is resolved immediately.
+
+        Args:
+            job_id (str): job UUID,
+            user_id (int): User Id. Optional, if set job must belong to user.
+
+        Returns:
+            Future of current event loop.
+
+        Raises:
+            AssertionError: if job is not found or belongs to another user.
+
+        """
+
+        pass
+
+    def evict(self) -> int:
+        """Remove finished jobs with expired TTL.
+
+        Returns:
+            Int with quantity of removed jobs.
+
+        """
+
+        pass
+
+
+class LoaderQueue:
+    """Bounded thread safe priority queue of download jobs with per-user fairness.
+
+    Each user has own queue ordered by priority with aging: size of file minus LOADER_AGING_RATE bytes for each
+    second of waiting, so small files are downloaded first, but large file is not starved by stream of small files and
+    its priority grows while it waits. Since current time is common for all jobs, order by size - rate * (now -
+    enqueued) equals order by size + rate * enqueued, so priority key of job is computed once on put and heap of user
+    is not reordered. Jobs restored from journal keep their enqueueing time, so their waiting time is counted too.
+    Users are served in round robin order, so one user can not hold all workers.
+
+    """
+
+    def __init__(self, maxsize: int = loader_queue_size, aging_rate: float = loader_aging_rate):
+        pass
+
+    def qsize(self) -> int:
+        """Get quantity of jobs in queue.
+
+        Returns:
+            Int with quantity of jobs.
+
+        """
+
+        pass
+
+    def put(self, job: LoaderJob):
+        """Put job into queue without waiting.
+
+        Args:
+            job (LoaderJob): Download job.
+
+        Raises:
+            Full: if queue is full.
+
+        """
+
+        pass
+
+    def get(self) -> LoaderJob:
+        """Take next job from queue. Wait if queue is empty.
+
+        Returns:
+            Download job.
+
+        """
+
+        pass
+
+    def task_done(self, job: LoaderJob):
+        """Mark job as done and record its wait time.
+
+        Args:
+            job (LoaderJob): Download job.
+
+        """
+
+        pass
+
+    def get_stats(self) -> typing.Dict[str, typing.Any]:
+        """Get queue statistics.
+
+        Returns:
+            Dict, which contains statistics. Keys:
+                depth (int): quantity of jobs in queue.
+                maxsize (int): max quantity of jobs in queue.
+                rejected (int): quantity of rejected jobs.
+                wait_time_avg (float): average wait time of job in queue in seconds.
+                wait_time_max (float): max wait time of job in queue in seconds.
+
+        """
+
+        pass
+
+
 class QueuedLoader(BaseLoader):
     """Daemon thread file loader class.
 
+    State and progress of each job are written into job table.
+
     """
 
-    def __init__(self, queue: Queue):
+    def __init__(self, queue: LoaderQueue, jobs: JobTable):
         pass
 
     def run(self):
@@ -72,3 +328,137 @@ class QueuedLoader(BaseLoader):
         """
 
         pass
+
+
+class JobJournal:
+    """Thread safe SQLite journal of download jobs.
+
+    Queued and running jobs are stored in journal, so they are replayed after restart. Done and failed jobs are
+    removed from journal.
+
+    """
+
+    def __init__(self, path: str = loader_journal_path):
+        pass
+
+    def add(self, job: LoaderJob):
+        """Save queued job.
+
+        Args:
+            job (LoaderJob): Download job.
+
+        """
+
+        pass
+
+    def set_state(self, job_id: str, state: str):
+        """Save job state. Finished jobs are removed.
+
+        Args:
+            job_id (str): job UUID,
+            state (str): queued, running, done or failed.
+
+        """
+
+        pass
+
+    def pending(self) -> typing.List[LoaderJob]:
+        """Get jobs, which were queued or running when app was stopped.
+
+        Jobs are rebuilt with stored job UUIDs and enqueueing times.
+
+        Returns:
+            List of download jobs in queued state in order of enqueueing.
+
+        """
+
+        pass
+
+    def close(self):
+        """Close journal connection.
+
+        """
+
+        pass
+
+
+class LoaderPool:
+    """Pool of daemon thread file loaders with shared priority queue.
+
+    Jobs are saved into journal before enqueueing, so they survive restart of app.
+
+    """
+
+    def __init__(
+            self, workers: int = loader_workers, maxsize: int = loader_queue_size,
+            journal_path: str = loader_journal_path):
+        pass
+
+    def replay(self) -> int:
+        """Put pending jobs from journal into queue. Called on startup.
+
+        Jobs are added into job table with their original UUIDs, so job Ids, which clients already have, are resolved.
+        Stale {filename}.{job_id}.part files of the same jobs left by interrupted copies are removed before enqueueing.
+
+        Returns:
+            Int with quantity of replayed jobs.
+
+        """
+
+        pass
+
+    def shutdown(self, timeout: float = loader_shutdown_timeout) -> bool:
+        """Stop accepting jobs and wait until in-flight copies are finished.
+
+        Jobs, which are still queued, stay in journal and are replayed on next startup.
+
+        Args:
+            timeout (float): Deadline of waiting in seconds.
+
+        Returns:
+            True if all in-flight copies are finished before deadline, False otherwise.
+
+        """
+
+        pass
+
+    @property
+    def queue(self) -> LoaderQueue:
+        """Queue getter.
+
+        Returns:
+            Shared priority queue of download jobs.
+
+        """
+
+        pass
+
+    @property
+    def jobs(self) -> JobTable:
+        """Job table getter.
+
+        Returns:
+            Table of download jobs.
+
+        """
+
+        pass
+
+    def submit(self, filename: str, is_signed: bool, user_id: int) -> str:
+        """Put download job into queue.
+
+        Args:
+            filename (str): file name,
+            is_signed (bool): check or not file signature,
+            user_id (int): user Id.
+
+        Returns:
+            Str with job UUID.
+
+        Raises:
+            AssertionError: if file does not exist, filename format is invalid,
+            Full: if queue is full.
+
+        """
+
+        pass
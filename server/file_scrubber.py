@@ -0,0 +1,128 @@
+# Copyright 2019 by Kirill Kanin.
+# All rights reserved.
+
+import os
+import json
+import logging
+import time
+import typing
+from threading import Thread, Lock, Event
+from concurrent.futures import ThreadPoolExecutor
+from server.file_service import FileServiceSigned
+
+logger = logging.getLogger(__name__)
+
+scrub_workers = int(os.environ['SCRUB_WORKERS'])
+scrub_rate_limit = int(os.environ['SCRUB_RATE_LIMIT'])
+checkpoint_extension = 'scrub'
+
+
+class RateLimiter:
+    """Thread safe token bucket limiter of read bytes per second.
+
+    """
+
+    def __init__(self, rate: int):
+        pass
+
+    def acquire(self, size: int):
+        """Wait until size bytes can be read without exceeding rate.
+
+        Args:
+            size (int): Quantity of bytes.
+
+        """
+
+        pass
+
+
+class FileScrubber(Thread):
+    """Daemon thread, which verifies signatures of all files in working directory.
+
+    Files are verified in parallel via thread pool bypassing signature cache, reading of each chunk is throttled by
+    rate limiter. Corrupted files, files
+    without signature and orphaned signature files are collected into report. Files are submitted in sorted order of
+    names and finish out of order, so checkpoint file {directory name}.scrub next to working directory stores the
+    lowest name, which is not finished yet. Interrupted scrub is resumed from this name, files, which were in flight
+    during crash, are verified again and no file is skipped.
+
+    """
+
+    def __init__(self, path: str, workers: int = scrub_workers, rate_limit: int = scrub_rate_limit):
+        pass
+
+    @property
+    def checkpoint_path(self) -> str:
+        """Checkpoint file path getter.
+
+        Returns:
+            Str with checkpoint file path.
+
+        """
+
+        pass
+
+    def load_checkpoint(self):
+        """Load progress and report from checkpoint file.
+
+        """
+
+        pass
+
+    def save_checkpoint(self):
+        """Save progress and report into checkpoint file atomically.
+
+        Progress is the lowest name among submitted and not finished files or name after the last submitted file if all
+        submitted files are finished.
+
+        """
+
+        pass
+
+    def scrub_file(self, filename: str) -> typing.Tuple[str, str]:
+        """Verify signature of file.
+
+        Signature is verified via FileServiceSigned.verify_signature with use_cache=False, so content is always
+        rehashed, and RateLimiter.acquire is passed as on_chunk callback, so reading is throttled chunk by chunk.
+
+        Args:
+            filename (str): Filename with .txt or .md5 file extension.
+
+        Returns:
+            Tuple with filename and result: ok, corrupted, missing_signature or orphaned_signature.
+
+        """
+
+        pass
+
+    def get_report(self) -> typing.Dict[str, typing.Any]:
+        """Get report of scrub.
+
+        Returns:
+            Dict, which contains report. Keys:
+                status (str): running, stopped or done.
+                started (str): date of scrub start.
+                finished (str): date of scrub finish.
+                checked (int): quantity of checked files.
+                bytes (int): quantity of read bytes.
+                corrupted (list): names of files with not matching signatures.
+                missing_signature (list): names of files without signature files.
+                orphaned_signature (list): names of signature files without data files.
+
+        """
+
+        pass
+
+    def stop(self):
+        """Stop scrub after verifying of current files and save checkpoint.
+
+        """
+
+        pass
+
+    def run(self):
+        """Run thread.
+
+        """
+
+        pass
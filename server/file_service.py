@@ -5,7 +5,343 @@ import os
 import typing
 import server.utils as utils
 from collections import OrderedDict
-from server.crypto import BaseCipher, AESCipher, RSACipher, HashAPI
+from threading import Lock
+from distutils.util import strtobool
+from server.crypto import BaseCipher, AESCipher, RSACipher, HashAPI, CryptoEngine
+from server.compression import CompressionAPI
+
+index_extension = 'index'
+order_fields = ('name', 'create_date')
+signature_cache_size = int(os.environ['SIGNATURE_CACHE_SIZE'])
+dedup_storage = bool(strtobool(os.environ['DEDUP_STORAGE']))
+blob_folder = '.blobs'
+blob_key_secret = os.environ['BLOB_KEY_SECRET']
+blob_log_compact_ratio = int(os.environ['BLOB_LOG_COMPACT_RATIO'])
+blob_refs_filename = 'refs.log'
+blob_pointer_magic = b'FSBLOB:'
+
+
+class FileRecord:
+    """Compact metadata record of file in working directory.
+
+    """
+
+    __slots__ = ('name', 'size', 'create_date', 'edit_date', 'security_level', 'user_id', 'is_signed', 'inode',
+                 'mtime_ns', 'stored_size')
+
+    def __init__(
+            self, name: str, size: int, create_date: str, edit_date: str, security_level: str, user_id: int = None,
+            is_signed: bool = False, inode: int = None, mtime_ns: int = None, stored_size: int = None):
+        pass
+
+    def to_dict(self) -> typing.Dict[str, str]:
+        """Convert record into dict for response.
+
+        Returns:
+            Dict, which contains info about file. Keys:
+                name (str): name of file with .txt extension.
+                create_date (str): date of file creation.
+                edit_date (str): date of last file modification.
+                size (int): logical size of file content in bytes,
+                stored_size (int): size of file on disk in bytes, equal to size if stored_size is not set,
+                security_level (str): security level of file,
+                user_id (int): owner's user Id,
+                is_signed (bool): signature file exists or not.
+
+        """
+
+        pass
+
+
+class FileIndex:
+    """Persistent metadata index of files in working directory.
+
+    Index is stored next to working directory in file {directory name}.index and refreshed incrementally: directory
+    is listed only if its mtime is changed, indexed entries are always stat'ed and only entries with changed inode or
+    mtime are re-read. Index is thread safe: refresh, update, remove and save are serialized with lock of index,
+    records returns snapshot of records.
+
+    """
+
+    def __init__(self, path: str):
+        pass
+
+    @property
+    def index_path(self) -> str:
+        """Index file path getter.
+
+        Returns:
+            Str with index file path.
+
+        """
+
+        pass
+
+    def load(self):
+        """Load index from index file.
+
+        Missing or damaged index file is ignored and index is rebuilt on next refresh.
+
+        """
+
+        pass
+
+    def save(self):
+        """Save index into index file atomically.
+
+        """
+
+        pass
+
+    def refresh(self):
+        """Refresh index incrementally.
+
+        Directory mtime gates only scan of directory: if it is changed, directory is listed, new files are added and
+        deleted files are removed. Entries already in index are stat'ed on each refresh regardless of directory mtime,
+        since in-place modification of file does not change mtime of directory, and files with changed inode or mtime
+        are re-read. Sizes of pointer files are taken from their blobs. Logical size of encrypted files is read from
+        container header, content is never decrypted.
+
+        """
+
+        pass
+
+    def update(self, filename: str) -> FileRecord:
+        """Add or update file record.
+
+        Args:
+            filename (str): Filename with .txt file extension.
+
+        Returns:
+            Updated file record.
+
+        """
+
+        pass
+
+    def remove(self, filename: str):
+        """Remove file record.
+
+        Args:
+            filename (str): Filename with .txt file extension.
+
+        """
+
+        pass
+
+    def records(self) -> typing.Iterator[FileRecord]:
+        """Get records of all files in index.
+
+        Returns:
+            Iterator of file records.
+
+        """
+
+        pass
+
+
+class SignatureCache:
+    """Bounded cache of verified file signatures.
+
+    Entry is keyed by pair of data path and signature path and stores (inode, size, mtime_ns) of data file and
+    signature file at the moment of verification, so any modification of one of files invalidates entry automatically.
+    For pointer files data path is resolved blob, which is shared by pointers with the same content, so signature path
+    is part of key and verification of one pointer is not reused for another pointer with different signature.
+
+    """
+
+    def __init__(self, size: int = signature_cache_size):
+        pass
+
+    def is_verified(self, data_path: str, signature_path: str) -> bool:
+        """Check whether signature of file was verified and both files are not changed since.
+
+        Args:
+            data_path (str): Path to data file,
+            signature_path (str): Path to signature file.
+
+        Returns:
+            True if signature was verified and files are not changed, False otherwise.
+
+        """
+
+        pass
+
+    def add(self, data_path: str, signature_path: str):
+        """Mark signature of file as verified.
+
+        The least recently used entry is evicted if cache is full.
+
+        Args:
+            data_path (str): Path to data file,
+            signature_path (str): Path to signature file.
+
+        """
+
+        pass
+
+    def invalidate(self, data_path: str, signature_path: str):
+        """Remove entry of file from cache.
+
+        Args:
+            data_path (str): Path to data file,
+            signature_path (str): Path to signature file.
+
+        """
+
+        pass
+
+    def clear(self):
+        """Remove all entries from cache.
+
+        """
+
+        pass
+
+
+class BlobStore:
+    """Content-addressed storage of file contents with reference counting.
+
+    Blobs are stored once in .blobs folder of working directory and keyed by content hash. Named .txt files are
+    pointers to blobs: small files with FSBLOB: prefix and blob key. Contents of medium and high security levels are
+    keyed by HMAC of user Id and content with BLOB_KEY_SECRET of server, so they are deduplicated per user only and
+    blob names do not reveal hash of content. Changes of reference counts are appended to .blobs/refs.log as +key and
+    -key records, so put and release write one record only and do not depend on quantity of blobs. Log is replayed on
+    load and compacted into one record per referenced blob, when quantity of records exceeds quantity of blobs
+    BLOB_LOG_COMPACT_RATIO times. Pointer files are scanned for recovery only, if refs log is missing or damaged. Store
+    is thread safe: put, release, compact and rebuild are serialized with lock of store, so concurrent updates of
+    reference count are not lost and blob is not deleted while pointers reference it.
+
+    """
+
+    def __init__(self, path: str):
+        pass
+
+    def load(self):
+        """Load reference counts by replaying refs log or rebuild them if log is missing or damaged.
+
+        Incomplete last record of log, which is left after crash during append, is ignored.
+
+        """
+
+        pass
+
+    def compact(self):
+        """Compact refs log into one record per referenced blob.
+
+        Compacted log is written into temporary file and replaced atomically, so log is not damaged on crash.
+
+        """
+
+        pass
+
+    def rebuild(self) -> int:
+        """Rebuild reference counts by scanning pointer files of working directory and write compacted refs log.
+
+        Used for recovery only. Blobs without references are deleted.
+
+        Returns:
+            Int with quantity of referenced blobs.
+
+        """
+
+        pass
+
+    def resolve(self, path: str) -> str:
+        """Resolve path of file into path of its content.
+
+        Args:
+            path (str): Path of .txt file.
+
+        Returns:
+            Str with path of blob if file is a pointer, path of file otherwise.
+
+        Raises:
+            AssertionError: if blob of pointer does not exist.
+
+        """
+
+        pass
+
+    def get_key(self, data: bytes, security_level: str, user_id: int = None) -> str:
+        """Get blob key of content.
+
+        Key of low security level content is hash of content. Key of medium and high security level content is
+        HashAPI.hmac_blake2b of user Id and content with BLOB_KEY_SECRET of server.
+
+        Args:
+            data (bytes): File content,
+            security_level (str): String with security level,
+            user_id (int): User Id.
+
+        Returns:
+            Str with blob key in hex format.
+
+        """
+
+        pass
+
+    def get_path(self, key: str) -> str:
+        """Get path of blob.
+
+        Args:
+            key (str): Blob key.
+
+        Returns:
+            Str with path of blob.
+
+        """
+
+        pass
+
+    def put(self, key: str, data: bytes) -> bool:
+        """Store blob if it does not exist and increment its reference count.
+
+        Increment is appended to refs log as one record.
+
+        Args:
+            key (str): Blob key,
+            data (bytes): Stored blob data.
+
+        Returns:
+            True if new blob is stored, False if existing blob is referenced.
+
+        """
+
+        pass
+
+    def release(self, key: str) -> int:
+        """Decrement reference count of blob and delete blob if count reaches zero.
+
+        Decrement is appended to refs log as one record.
+
+        Args:
+            key (str): Blob key.
+
+        Returns:
+            Int with remaining reference count.
+
+        Raises:
+            AssertionError: if blob does not exist.
+
+        """
+
+        pass
+
+    def get_stats(self) -> typing.Dict[str, typing.Any]:
+        """Get deduplication statistics.
+
+        Returns:
+            Dict, which contains statistics. Keys:
+                blobs (int): quantity of stored blobs.
+                references (int): quantity of references to blobs.
+                logical_size (int): total size of all referenced contents in bytes.
+                stored_size (int): total size of stored blobs in bytes.
+                dedup_ratio (float): ratio of logical size to stored size.
+
+        """
+
+        pass
 
 
 class FileService:
@@ -41,6 +377,52 @@ class FileService:
 
         pass
 
+    @property
+    def index(self) -> FileIndex:
+        """Metadata index getter.
+
+        Returns:
+            Metadata index of working directory.
+
+        """
+
+        pass
+
+    @property
+    def crypto_engine(self) -> CryptoEngine:
+        """Crypto engine getter.
+
+        Returns:
+            Crypto engine for encrypting and decrypting file content.
+
+        """
+
+        pass
+
+    @property
+    def blob_store(self) -> typing.Optional[BlobStore]:
+        """Content-addressed storage getter.
+
+        Returns:
+            Content-addressed storage of working directory or None if deduplication is disabled.
+
+        """
+
+        pass
+
+    def get_storage_stats(self) -> typing.Dict[str, typing.Any]:
+        """Get statistics of content-addressed storage.
+
+        Returns:
+            Dict with statistics in format of BlobStore.get_stats.
+
+        Raises:
+            AssertionError: if deduplication is disabled.
+
+        """
+
+        pass
+
     @staticmethod
     def change_dir(path: str):
         """Change current directory of app.
@@ -55,6 +437,41 @@ class FileService:
 
         pass
 
+    def get_file_path(self, filename: str) -> str:
+        """Get full path of file content in working directory.
+
+        If file is a pointer to blob, path is resolved via blob store, so callers, which read, hash, send or copy
+        content, work with blob and not with pointer.
+
+        Args:
+            filename (str): Filename without .txt file extension.
+
+        Returns:
+            Str with full path of file or of its blob.
+
+        Raises:
+            AssertionError: if file does not exist, filename format is invalid.
+
+        """
+
+        pass
+
+    def get_file_record(self, filename: str) -> FileRecord:
+        """Get metadata record of file from index.
+
+        Args:
+            filename (str): Filename without .txt file extension.
+
+        Returns:
+            Metadata record of file.
+
+        Raises:
+            AssertionError: if file does not exist, filename format is invalid.
+
+        """
+
+        pass
+
     def get_file_data(self, filename: str, user_id: int = None) -> typing.Dict[str, str]:
         """Get full info about file.
 
@@ -79,9 +496,43 @@ class FileService:
 
         pass
 
+    def get_file_range(
+            self, filename: str, offset: int, user_id: int = None,
+            length: int = None) -> typing.Dict[str, typing.Any]:
+        """Get info about file with range of its content.
+
+        For files in chunked container format only chunks, which cover requested range, are decrypted and
+        decompressed, since chunks are compressed one by one.
+
+        Args:
+            filename (str): Filename without .txt file extension,
+            offset (int): Offset of content range in bytes,
+            user_id (int): User Id,
+            length (int): Length of content range in bytes. Optional, whole content after offset by default.
+
+        Returns:
+            Dict, which contains full info about file. Keys:
+                name (str): name of file with .txt extension.
+                content (bytes): range of file content. Range, which ends inside multibyte character, is returned
+                as is and not decoded.
+                create_date (str): date of file creation.
+                edit_date (str): date of last file modification.
+                size (int): total logical size of file content in bytes,
+                user_id (int): user Id.
+
+        Raises:
+            AssertionError: if file does not exist, filename format is invalid,
+            ValueError: if security level is invalid.
+
+        """
+
+        pass
+
     async def get_file_data_async(self, filename: str, user_id: int = None) -> typing.Dict[str, str]:
         """Get full info about file. Asynchronous version.
 
+        Content is decrypted via crypto engine, so event loop is not blocked.
+
         Args:
             filename (str): Filename without .txt file extension,
             user_id (int): User Id.
@@ -103,15 +554,87 @@ class FileService:
 
         pass
 
-    def get_files(self) -> typing.List[typing.Dict[str, str]]:
+    async def get_file_range_async(
+            self, filename: str, offset: int, user_id: int = None,
+            length: int = None) -> typing.Dict[str, typing.Any]:
+        """Get info about file with range of its content. Asynchronous version.
+
+        Content is decrypted via crypto engine, so event loop is not blocked. Path of file and requested range are
+        passed to engine task, which decrypts only chunks covering range.
+
+        Args:
+            filename (str): Filename without .txt file extension,
+            offset (int): Offset of content range in bytes,
+            user_id (int): User Id,
+            length (int): Length of content range in bytes. Optional, whole content after offset by default.
+
+        Returns:
+            Dict, which contains full info about file. Keys:
+                name (str): name of file with .txt extension.
+                content (bytes): range of file content. Range, which ends inside multibyte character, is returned
+                as is and not decoded.
+                create_date (str): date of file creation.
+                edit_date (str): date of last file modification.
+                size (int): total logical size of file content in bytes,
+                user_id (int): user Id.
+
+        Raises:
+            AssertionError: if file does not exist, filename format is invalid,
+            ValueError: if security level is invalid.
+
+        """
+
+        pass
+
+    def iter_files(
+            self, order_by: str = 'name', cursor: str = None,
+            limit: int = None) -> typing.Iterator[typing.Dict[str, str]]:
+        """Get info about files in working directory one by one.
+
+        Files are ordered by name or by creation date and name, so order is stable between calls. Cursor is an opaque
+        string with position of last returned file, files are yielded starting after it.
+
+        Args:
+            order_by (str): Field for ordering: name or create_date. Default: name,
+            cursor (str): Cursor returned with previous page. Optional,
+            limit (int): Max quantity of files. Optional.
+
+        Returns:
+            Iterator of dicts, which contains info about each file. Keys are the same as in get_files.
+
+        Raises:
+            AssertionError: if order field is invalid, cursor format is invalid, limit is not positive.
+
+        """
+
+        pass
+
+    def get_files(
+            self, order_by: str = 'name', cursor: str = None,
+            limit: int = None) -> typing.Tuple[typing.List[typing.Dict[str, str]], str]:
         """Get info about all files in working directory.
 
+        Info is served from metadata index, which is refreshed incrementally before reading.
+
+        Args:
+            order_by (str): Field for ordering: name or create_date. Default: name,
+            cursor (str): Cursor returned with previous page. Optional,
+            limit (int): Max quantity of files. Optional.
+
         Returns:
-            List of dicts, which contains info about each file. Keys:
+            Tuple with list of dicts, which contains info about each file, and cursor of next page or None if it is the
+            last page. Keys of dicts:
                 name (str): name of file with .txt extension.
                 create_date (str): date of file creation.
                 edit_date (str): date of last file modification.
-                size (str): size of file in bytes.
+                size (str): logical size of file content in bytes,
+                stored_size (int): size of file on disk in bytes,
+                security_level (str): security level of file,
+                user_id (int): owner's user Id,
+                is_signed (bool): signature file exists or not.
+
+        Raises:
+            AssertionError: if order field is invalid, cursor format is invalid, limit is not positive.
 
         """
 
@@ -121,7 +644,12 @@ class FileService:
             self, content: str = None, security_level: str = None, user_id: int = None) -> typing.Dict[str, str]:
         """Create new .txt file.
 
-        Method generates name of file from random string with digits and latin letters.
+        Method generates name of file from random string with digits and latin letters and adds file into metadata
+        index. Content is encrypted via crypto engine straight into file with encrypt_stream, so event loop is not
+        blocked and cipher text is not built in memory. Chunks of content with medium and
+        high security levels are compressed before encrypting if content is compressible, codec is recorded in
+        container header. Content with low security level is stored as is. If deduplication is enabled, content is
+        stored in content-addressed storage and file is a pointer to blob.
 
         Args:
             content (str): String with file content,
@@ -145,7 +673,9 @@ class FileService:
         pass
 
     def delete_file(self, filename: str):
-        """Delete file.
+        """Delete file and remove it from metadata index.
+
+        If file is a pointer to blob, reference count of blob is decremented and blob is deleted when it reaches zero.
 
         Args:
             filename (str): Filename without .txt file extension.
@@ -164,11 +694,50 @@ class FileService:
 class FileServiceSigned(FileService):
     """Singleton class with methods for working with file system and file signatures.
 
+    Signatures are computed via HashAPI.hash_file of path returned by get_file_path, so contents of pointer files are
+    hashed, and written into .md5 files with signature format version, so old signature files are verified with MD5.
+    Verified signatures are kept in signature cache.
+
     """
 
+    @property
+    def signature_cache(self) -> SignatureCache:
+        """Signature cache getter.
+
+        Returns:
+            Cache of verified file signatures.
+
+        """
+
+        pass
+
+    def verify_signature(
+            self, filename: str, use_cache: bool = True, on_chunk: typing.Callable[[int], None] = None) -> bool:
+        """Verify signature of file.
+
+        If use_cache is set, hash is not recomputed for files, which are verified in signature cache. Otherwise content
+        is always rehashed, so corruption, which does not change inode, size and mtime, is detected too.
+
+        Args:
+            filename (str): Filename without .txt file extension,
+            use_cache (bool): Use signature cache or not. Default: True,
+            on_chunk (function): Callback for HashAPI.hash_file, which takes size of each hashed chunk. Optional.
+
+        Returns:
+            True if signatures are match, False otherwise.
+
+        Raises:
+            AssertionError: if file does not exist, filename format is invalid, signature file does not exist.
+
+        """
+
+        pass
+
     def get_file_data(self, filename: str, user_id: int = None) -> typing.Dict[str, str]:
         """Get full info about file.
 
+        Hash is not recomputed if signature was verified before and neither data file nor signature file is changed.
+
         Args:
             filename (str): Filename without .txt file extension,
             user_id (int): User Id.
@@ -191,9 +760,44 @@ class FileServiceSigned(FileService):
 
         pass
 
+    def get_file_range(
+            self, filename: str, offset: int, user_id: int = None,
+            length: int = None) -> typing.Dict[str, typing.Any]:
+        """Get info about file with range of its content.
+
+        Signature is checked for whole file content, not only for requested range. Hash is not recomputed if
+        signature was verified before and neither data file nor signature file is changed.
+
+        Args:
+            filename (str): Filename without .txt file extension,
+            offset (int): Offset of content range in bytes,
+            user_id (int): User Id,
+            length (int): Length of content range in bytes. Optional, whole content after offset by default.
+
+        Returns:
+            Dict, which contains full info about file. Keys:
+                name (str): name of file with .txt extension.
+                content (bytes): range of file content. Range, which ends inside multibyte character, is returned
+                as is and not decoded.
+                create_date (str): date of file creation.
+                edit_date (str): date of last file modification.
+                size (int): total logical size of file content in bytes,
+                user_id (int): user Id.
+
+        Raises:
+            AssertionError: if file does not exist, filename format is invalid, signatures are not match,
+            signature file does not exist,
+            ValueError: if security level is invalid.
+
+        """
+
+        pass
+
     async def get_file_data_async(self, filename: str, user_id: int = None) -> typing.Dict[str, str]:
         """Get full info about file. Asynchronous version.
 
+        Content is decrypted via crypto engine, so event loop is not blocked.
+
         Args:
             filename (str): Filename without .txt file extension,
             user_id (int): User Id.
@@ -216,11 +820,45 @@ class FileServiceSigned(FileService):
 
         pass
 
+    async def get_file_range_async(
+            self, filename: str, offset: int, user_id: int = None,
+            length: int = None) -> typing.Dict[str, typing.Any]:
+        """Get info about file with range of its content. Asynchronous version.
+
+        Content is decrypted via crypto engine, so event loop is not blocked. Path of file and requested range are
+        passed to engine task, which decrypts only chunks covering range.
+
+        Args:
+            filename (str): Filename without .txt file extension,
+            offset (int): Offset of content range in bytes,
+            user_id (int): User Id,
+            length (int): Length of content range in bytes. Optional, whole content after offset by default.
+
+        Returns:
+            Dict, which contains full info about file. Keys:
+                name (str): name of file with .txt extension.
+                content (bytes): range of file content. Range, which ends inside multibyte character, is returned
+                as is and not decoded.
+                create_date (str): date of file creation.
+                edit_date (str): date of last file modification.
+                size (int): total logical size of file content in bytes,
+                user_id (int): user Id.
+
+        Raises:
+            AssertionError: if file does not exist, filename format is invalid, signatures are not match,
+            signature file does not exist,
+            ValueError: if security level is invalid.
+
+        """
+
+        pass
+
     async def create_file(
             self, content: str = None, security_level: str = None, user_id: int = None) -> typing.Dict[str, str]:
         """Create new .txt file with signature file.
 
-        Method generates name of file from random string with digits and latin letters.
+        Method generates name of file from random string with digits and latin letters. Content is encrypted via
+        crypto engine straight into file, so event loop is not blocked.
 
         Args:
             content (str): String with file content,
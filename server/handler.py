@@ -1,16 +1,27 @@
 # Copyright 2019 by Kirill Kanin.
 # All rights reserved.
 
+import os
 import json
+import asyncio
+import typing
 from aiohttp import web
-from queue import Queue
+from queue import Queue, Full
 from distutils.util import strtobool
 from server.file_service import FileService, FileServiceSigned
-from server.file_loader import FileLoader, QueuedLoader
+from server.file_loader import FileLoader, QueuedLoader, LoaderPool
+from server.file_scrubber import FileScrubber
 from server.users import UsersAPI
-from server.role_model import RoleModel
+from server.role_model import RoleModel, PermissionMatrix
 from server.users_sql import UsersSQLAPI
 from server.role_model_sql import RoleModelSQL
+from server.session_cache import SessionCache
+from server.sql_pool import ConnectionPool
+from server.db_session import get_session, run_in_session
+
+batch_concurrency = int(os.environ['BATCH_CONCURRENCY'])
+batch_max_size = int(os.environ['BATCH_MAX_SIZE'])
+batch_operations = {'create': 'create_file', 'delete': 'delete_file', 'get_info': 'get_file_info'}
 
 
 class Handler:
@@ -38,14 +49,25 @@ class Handler:
     @RoleModel.role_model
     # @UsersSQLAPI.authorized
     # @RoleModelSQL.role_model
-    async def get_files(self, request: web.Request, *args, **kwargs) -> web.Response:
+    async def get_files(self, request: web.Request, *args, **kwargs) -> web.StreamResponse:
         """Coroutine for getting info about all files in working directory.
 
+        Info is served from metadata index of file service. In stream mode JSON array elements are written into
+        stream response as they are produced by file service, so whole list is never built in memory.
+
         Args:
-            request (Request): aiohttp request.
+            request (Request): aiohttp request, contains optional query parameters:
+                order_by (str): field for ordering: name or create_date. Default: name,
+                cursor (str): cursor of page returned with previous response,
+                limit (int): max quantity of files in page,
+                stream (bool): stream JSON array or not. Default: false.
 
         Returns:
-            Response: JSON response with success status and data or error status and error message.
+            StreamResponse: JSON response with success status, data and cursor of next page or error status and error
+            message. In stream mode JSON array with info about files.
+
+        Raises:
+            HTTPBadRequest: 400 HTTP error, if error.
 
         """
 
@@ -116,6 +138,72 @@ class Handler:
 
         pass
 
+    async def run_batch_operation(
+            self, index: int, operation: typing.Dict[str, typing.Any], user_id: int, role: str,
+            semaphore: asyncio.Semaphore) -> typing.Dict[str, typing.Any]:
+        """Coroutine for running one operation of batch.
+
+        Access to operation is checked with PermissionMatrix.is_allowed for role and handler method of operation type.
+        Create operation awaits create_file and get_info operation awaits get_file_data_async of FileServiceSigned if
+        is_signed is set or FileService otherwise, so crypto work goes through size-based dispatch and bounded queue of
+        crypto engine. Synchronous FileService.delete_file is run in executor of event loop, it is safe to run
+        concurrently, since metadata index and blob store are thread safe.
+
+        Args:
+            index (int): Index of operation in batch,
+            operation (dict): Operation in format of batch_files request,
+            user_id (int): User Id,
+            role (str): Role name of user,
+            semaphore (Semaphore): Semaphore, which bounds quantity of concurrent operations.
+
+        Returns:
+            Dict, which contains result of operation. Keys:
+                index (int): index of operation in batch.
+                status (str): success or error.
+                data (dict): result of file service for create and get_info operations.
+                message (str): success message of delete operation or error message.
+
+        """
+
+        pass
+
+    @UsersAPI.authorized
+    @RoleModel.role_model
+    # @UsersSQLAPI.authorized
+    # @RoleModelSQL.role_model
+    async def batch_files(self, request: web.Request, *args, **kwargs) -> web.StreamResponse:
+        """Coroutine for running batch of file operations.
+
+        User is authorized once for the whole batch, access to each operation is checked in permission matrix for role
+        name, which UsersAPI.authorized passes in kwargs role from session cache.
+        Operations are run concurrently, quantity of concurrent operations is bounded by BATCH_CONCURRENCY. Results are
+        streamed as JSON lines in order of completion.
+
+        Args:
+            request (Request): aiohttp request, contains JSON in body. JSON format:
+            {
+                "operations": [
+                    {
+                        "type": "string. Operation type: create, delete or get_info. Required",
+                        "filename": "string. Filename without extension. Required for delete and get_info",
+                        "content": "string. Content string. Optional for create",
+                        "security_level": "string. Security level. Optional for create. Default: low",
+                        "is_signed": "boolean. Sign or check signature of file. Optional. Default: false"
+                    }
+                ]
+            }.
+
+        Returns:
+            StreamResponse: stream of JSON lines with result of each operation or JSON response with error status and
+            error message.
+
+        Raises:
+            HTTPBadRequest: 400 HTTP error, if error, batch is empty or larger than BATCH_MAX_SIZE.
+
+        """
+
+        pass
+
     @UsersAPI.authorized
     @RoleModel.role_model
     # @UsersSQLAPI.authorized
@@ -136,6 +224,38 @@ class Handler:
 
         pass
 
+    @UsersAPI.authorized
+    @RoleModel.role_model
+    # @UsersSQLAPI.authorized
+    # @RoleModelSQL.role_model
+    async def get_file_content(self, request: web.Request, *args, **kwargs) -> web.StreamResponse:
+        """Coroutine for sending file content from working directory.
+
+        Files with low security level are stored as plain text and sent via sendfile with file response, which
+        supports Range and If-Modified-Since headers. Path of content is taken from FileService.get_file_path, so blob
+        is sent for pointer files. Files with medium and high security levels are decrypted via file
+        service, Range header is supported too: requested range is read via get_file_range_async, which always returns
+        bytes, and only chunks, which cover requested range, are decrypted.
+
+        If is_signed parameter is set, FileServiceSigned.verify_signature is run in executor of event loop before file
+        response is created, so unsigned or tampered content is never sent via sendfile. Signature is checked for whole
+        file content, also if range is requested, and error response is returned if signatures are not match.
+
+        Args:
+            request (Request): aiohttp request, contains filename and is_signed parameters.
+
+        Returns:
+            StreamResponse: file response with file content, response with decrypted file content or its range or JSON
+            response with error status and error message.
+
+        Raises:
+            HTTPBadRequest: 400 HTTP error, if error, signatures are not match or signature file does not exist,
+            HTTPRequestRangeNotSatisfiable: 416 HTTP error, if range is invalid.
+
+        """
+
+        pass
+
     @UsersAPI.authorized
     @RoleModel.role_model
     # @UsersSQLAPI.authorized
@@ -143,12 +263,60 @@ class Handler:
     async def download_file_queued(self, request: web.Request, *args, **kwargs) -> web.Response:
         """Coroutine for downloading files from working directory via queue.
 
+        Job is put into priority queue of loader pool.
+
         Args:
             request (Request): aiohttp request, contains filename and is_signed parameters.
 
+        Returns:
+            Response: JSON response with success status, success message and job UUID or error status and error
+            message.
+
+        Raises:
+            HTTPBadRequest: 400 HTTP error, if error,
+            HTTPTooManyRequests: 429 HTTP error, if queue is full.
+
+        """
+
+        pass
+
+    @UsersAPI.authorized
+    @RoleModel.role_model
+    # @UsersSQLAPI.authorized
+    # @RoleModelSQL.role_model
+    async def scrub_files(self, request: web.Request, *args, **kwargs) -> web.Response:
+        """Coroutine for starting integrity scrub of signed files in working directory.
+
+        Scrub is resumed from checkpoint if previous scrub was interrupted.
+
+        Args:
+            request (Request): aiohttp request, contains optional query parameters:
+                workers (int): quantity of worker threads,
+                rate_limit (int): max quantity of read bytes per second.
+
         Returns:
             Response: JSON response with success status and success message or error status and error message.
 
+        Raises:
+            HTTPBadRequest: 400 HTTP error, if error, scrub is already running.
+
+        """
+
+        pass
+
+    @UsersAPI.authorized
+    @RoleModel.role_model
+    # @UsersSQLAPI.authorized
+    # @RoleModelSQL.role_model
+    async def get_scrub_report(self, request: web.Request, *args, **kwargs) -> web.Response:
+        """Coroutine for getting report of integrity scrub.
+
+        Args:
+            request (Request): aiohttp request.
+
+        Returns:
+            Response: JSON response with success status and report or error status and error message.
+
         Raises:
             HTTPBadRequest: 400 HTTP error, if error.
 
@@ -156,9 +324,100 @@ class Handler:
 
         pass
 
+    @UsersAPI.authorized
+    @RoleModel.role_model
+    # @UsersSQLAPI.authorized
+    # @RoleModelSQL.role_model
+    async def get_storage_stats(self, request: web.Request, *args, **kwargs) -> web.Response:
+        """Coroutine for getting statistics of content-addressed storage.
+
+        Args:
+            request (Request): aiohttp request.
+
+        Returns:
+            Response: JSON response with success status and statistics or error status and error message.
+
+        Raises:
+            HTTPBadRequest: 400 HTTP error, if error, deduplication is disabled.
+
+        """
+
+        pass
+
+    @UsersAPI.authorized
+    @RoleModel.role_model
+    # @UsersSQLAPI.authorized
+    # @RoleModelSQL.role_model
+    async def get_metrics(self, request: web.Request, *args, **kwargs) -> web.Response:
+        """Coroutine for getting server metrics.
+
+        Session reaper is not a singleton, so it is taken from request.app['session_reaper'], where it is stored by
+        main on app configuration. Metrics of other components are taken from their singleton instances.
+
+        Args:
+            request (Request): aiohttp request.
+
+        Returns:
+            Response: JSON response with success status and metrics or error status and error message. Metrics keys:
+                session_cache (dict): hits, misses and hit_rate of session cache.
+                sql_pool (dict): statistics of SQL connection pool.
+                session_reaper (dict): statistics of last pass of session reaper.
+                loader_queue (dict): statistics of queue of loader pool.
+
+        Raises:
+            HTTPBadRequest: 400 HTTP error, if error.
+
+        """
+
+        pass
+
+    @UsersAPI.authorized
+    @RoleModel.role_model
+    # @UsersSQLAPI.authorized
+    # @RoleModelSQL.role_model
+    async def get_download_status(self, request: web.Request, *args, **kwargs) -> web.Response:
+        """Coroutine for getting status of queued download.
+
+        Args:
+            request (Request): aiohttp request, contains job_id.
+
+        Returns:
+            Response: JSON response with success status and job status or error status and error message.
+
+        Raises:
+            HTTPBadRequest: 400 HTTP error, if error, job is not found.
+
+        """
+
+        pass
+
+    @UsersAPI.authorized
+    @RoleModel.role_model
+    # @UsersSQLAPI.authorized
+    # @RoleModelSQL.role_model
+    async def wait_download_status(self, request: web.Request, *args, **kwargs) -> web.Response:
+        """Coroutine for waiting until queued download is finished. Long-poll version of get_download_status.
+
+        Args:
+            request (Request): aiohttp request, contains job_id and optional timeout parameter in seconds.
+
+        Returns:
+            Response: JSON response with success status and job status or error status and error message. If job is
+            not finished during timeout, current job status is returned.
+
+        Raises:
+            HTTPBadRequest: 400 HTTP error, if error, job is not found.
+
+        """
+
+        pass
+
     async def signup(self, request: web.Request, *args, **kwargs) -> web.Response:
         """Coroutine for signing up user.
 
+        Body calls UsersAPI.signup via run_in_session with database session of request, so blocking ORM calls do not run
+        on event loop.
+
         Args:
             request (Request): aiohttp request, contains JSON in body. JSON format:
             {
@@ -182,6 +441,9 @@ class Handler:
     async def signin(self, request: web.Request, *args, **kwargs) -> web.Response:
         """Coroutine for signing in user.
 
+        Body calls UsersAPI.signin via run_in_session with database session of request, so blocking ORM calls do not run
+        on event loop.
+
         Args:
             request (Request): aiohttp request, contains JSON in body. JSON format:
             {
@@ -203,6 +465,9 @@ class Handler:
     async def logout(self, request: web.Request, *args, **kwargs) -> web.Response:
         """Coroutine for logout.
 
+        Body calls UsersAPI.logout via run_in_session with database session of request, so blocking ORM calls do not run
+        on event loop.
+
         Args:
             request (Request): aiohttp request, contains session_id.
 
@@ -223,6 +488,9 @@ class Handler:
     async def add_method(self, request: web.Request, *args, **kwargs) -> web.Response:
         """Coroutine for adding method into role model.
 
+        Body calls RoleModel.add_method via run_in_session with database session of request, so blocking ORM calls do
+        not run on event loop.
+
         Args:
             request (Request): aiohttp request, contains method name.
 
@@ -243,6 +511,9 @@ class Handler:
     async def delete_method(self, request: web.Request, *args, **kwargs) -> web.Response:
         """Coroutine for deleting method from role model.
 
+        Body calls RoleModel.delete_method via run_in_session with database session of request, so blocking ORM calls do
+        not run on event loop.
+
         Args:
             request (Request): aiohttp request, contains method name.
 
@@ -263,6 +534,9 @@ class Handler:
     async def add_role(self, request: web.Request, *args, **kwargs) -> web.Response:
         """Coroutine for adding role into role method.
 
+        Body calls RoleModel.add_role via run_in_session with database session of request, so blocking ORM calls do not
+        run on event loop.
+
         Args:
             request (Request): aiohttp request, contains role name.
 
@@ -283,6 +557,9 @@ class Handler:
     async def delete_role(self, request: web.Request, *args, **kwargs) -> web.Response:
         """Coroutine for deleting role from role method.
 
+        Body calls RoleModel.delete_role via run_in_session with database session of request, so blocking ORM calls do
+        not run on event loop.
+
         Args:
             request (Request): aiohttp request, contains role name.
 
@@ -303,6 +580,9 @@ class Handler:
     async def add_method_to_role(self, request: web.Request, *args, **kwargs) -> web.Response:
         """Coroutine for adding method to role.
 
+        Body calls RoleModel.add_method_to_role via run_in_session with database session of request, so blocking ORM
+        calls do not run on event loop.
+
         Args:
             request (Request): aiohttp request, contains JSON in body. JSON format:
             {
@@ -327,6 +607,9 @@ class Handler:
     async def delete_method_from_role(self, request: web.Request, *args, **kwargs) -> web.Response:
         """Coroutine for deleting method from role.
 
+        Body calls RoleModel.delete_method_from_role via run_in_session with database session of request, so blocking
+        ORM calls do not run on event loop.
+
         Args:
             request (Request): aiohttp request, contains JSON in body. JSON format:
             {
@@ -351,6 +634,9 @@ class Handler:
     async def change_shared_prop(self, request: web.Request, *args, **kwargs) -> web.Response:
         """Coroutine for changing shared property of method.
 
+        Body calls RoleModel.change_shared_prop via run_in_session with database session of request, so blocking ORM
+        calls do not run on event loop.
+
         Args:
             request (Request): aiohttp request, contains JSON in body. JSON format:
             {
@@ -375,6 +661,9 @@ class Handler:
     async def change_user_role(self, request: web.Request, *args, **kwargs) -> web.Response:
         """Coroutine for setting new role to user.
 
+        Body calls RoleModel.change_user_role via run_in_session with database session of request, so blocking ORM calls
+        do not run on event loop.
+
         Args:
             request (Request): aiohttp request, contains JSON in body. JSON format:
             {
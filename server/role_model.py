@@ -1,8 +1,58 @@
 # Copyright 2019 by Kirill Kanin.
 # All rights reserved.
 
+from threading import Lock
+from typing import Dict, Tuple
 from aiohttp import web
+from sqlalchemy.orm.session import Session as DBSession
 #from server.database import DataBase
+from server.session_cache import SessionCache
+from server.utils import SingletonMeta
+
+
+class PermissionMatrix(metaclass=SingletonMeta):
+    """Singleton class with in-memory matrix of access permissions.
+
+    Each role is mapped to bitset of allowed methods, where bit number is method Id. Shared methods are folded into
+    bitsets of all roles. Matrix is built at app startup and rebuilt after each change of role model, new snapshot
+    replaces old one atomically, so readers never see partially built matrix.
+
+    """
+
+    def __init__(self):
+        pass
+
+    @property
+    def snapshot(self) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """Current matrix snapshot getter.
+
+        Returns:
+            Tuple with dict of method names to method bits and dict of role names to bitsets of allowed methods.
+
+        """
+
+        pass
+
+    def build(self):
+        """Build matrix from database and replace current snapshot.
+
+        """
+
+        pass
+
+    def is_allowed(self, role_name: str, method_name: str) -> bool:
+        """Check access permission without database access.
+
+        Args:
+            role_name (str): Role name,
+            method_name (str): Method name.
+
+        Returns:
+            True if method is shared or allowed for role, False otherwise.
+
+        """
+
+        pass
 
 
 class RoleModel:
@@ -14,6 +64,9 @@ class RoleModel:
     def role_model(func):
         """Decorator for checking access permissions in role model.
 
+        Permissions are checked in permission matrix for role name, which is passed in kwargs role by
+        UsersAPI.authorized from session cache, so database is not queried.
+
         Args:
             func (function): Method for decoration.
 
@@ -43,24 +96,35 @@ class RoleModel:
         pass
 
     @staticmethod
-    def add_method(method_name: str):
+    def add_method(db_session: DBSession, method_name: str):
         """Add new method.
 
+        Uniqueness of method name is checked by database constraint. Changes are flushed but not committed, so
+        IntegrityError of constraint violation is raised inside call and mapped to AssertionError, commit is done by
+        database session middleware. Permission matrix is rebuilt with db_session after flush.
+
         Args:
+            db_session (DBSession): Database session of request,
             method_name (str): Method name.
 
         Raises:
-            AssertionError: if method exists.
+            AssertionError: if method exists. IntegrityError of violation of unique constraint ux_method_name is mapped
+            to AssertionError.
 
         """
 
         pass
 
     @staticmethod
-    def delete_method(method_name: str):
+    def delete_method(db_session: DBSession, method_name: str):
         """Delete method.
 
+        Changes are flushed but not committed, so IntegrityError of constraint violation is raised inside call and
+        mapped to AssertionError, commit is done by database session middleware. Permission matrix is rebuilt with
+        db_session after flush.
+
         Args:
+            db_session (DBSession): Database session of request,
             method_name (str): Method name.
 
         Raises:
@@ -71,24 +135,35 @@ class RoleModel:
         pass
 
     @staticmethod
-    def add_role(role_name: str):
+    def add_role(db_session: DBSession, role_name: str):
         """Add new role.
 
+        Uniqueness of role name is checked by database constraint. Changes are flushed but not committed, so
+        IntegrityError of constraint violation is raised inside call and mapped to AssertionError, commit is done by
+        database session middleware. Permission matrix is rebuilt with db_session after flush.
+
         Args:
+            db_session (DBSession): Database session of request,
             role_name (str): Role name.
 
         Raises:
-            AssertionError: if role exists.
+            AssertionError: if role exists. IntegrityError of violation of unique constraint ux_role_name is mapped to
+            AssertionError.
 
         """
 
         pass
 
     @staticmethod
-    def delete_role(role_name: str):
+    def delete_role(db_session: DBSession, role_name: str):
         """Delete role.
 
+        Changes are flushed but not committed, so IntegrityError of constraint violation is raised inside call and
+        mapped to AssertionError, commit is done by database session middleware. Permission matrix is rebuilt with
+        db_session after flush.
+
         Args:
+            db_session (DBSession): Database session of request,
             role_name (str): Role name.
 
         Raises:
@@ -99,27 +174,38 @@ class RoleModel:
         pass
 
     @staticmethod
-    def add_method_to_role(**kwargs):
+    def add_method_to_role(db_session: DBSession, **kwargs):
         """Add method to role.
 
+        Uniqueness of method in role is checked by database constraint. Changes are flushed but not committed, so
+        IntegrityError of constraint violation is raised inside call and mapped to AssertionError, commit is done by
+        database session middleware. Permission matrix is rebuilt with db_session after flush.
+
         Args:
+            db_session (DBSession): Database session of request,
             **kwargs (dict): Dict with named arguments. Keys:
                 method_name (str): Method name. Required.
                 role_name (str): Role name. Required.
 
         Raises:
             AssertionError: if at least one required parameter in kwargs is not set, method is not found, role is not
-            found, method is already added to role.
+            found, method is already added to role. IntegrityError of violation of unique constraint
+            ux_methodrole_role_method is mapped to AssertionError.
 
         """
 
         pass
 
     @staticmethod
-    def delete_method_from_role(**kwargs):
+    def delete_method_from_role(db_session: DBSession, **kwargs):
         """Delete method from role.
 
+        Changes are flushed but not committed, so IntegrityError of constraint violation is raised inside call and
+        mapped to AssertionError, commit is done by database session middleware. Permission matrix is rebuilt with
+        db_session after flush.
+
         Args:
+            db_session (DBSession): Database session of request,
             **kwargs (dict): Dict with named arguments. Keys:
                 method_name (str): Method name. Required.
                 role_name (str): Role name. Required.
@@ -133,10 +219,15 @@ class RoleModel:
         pass
 
     @staticmethod
-    def change_shared_prop(**kwargs):
+    def change_shared_prop(db_session: DBSession, **kwargs):
         """Change method's shared property.
 
+        Changes are flushed but not committed, so IntegrityError of constraint violation is raised inside call and
+        mapped to AssertionError, commit is done by database session middleware. Permission matrix is rebuilt with
+        db_session after flush.
+
         Args:
+            db_session (DBSession): Database session of request,
             **kwargs (dict): Dict with named arguments. Keys:
                 method_name (str): Method name. Required.
                 value (bool): Value of shared property. Required.
@@ -150,10 +241,15 @@ class RoleModel:
         pass
 
     @staticmethod
-    def change_user_role(**kwargs):
+    def change_user_role(db_session: DBSession, **kwargs):
         """Change user role.
 
+        Sessions of user are removed from session cache, so new role is applied immediately. Changes are flushed but not
+        committed, so IntegrityError of constraint violation is raised inside call and mapped to AssertionError, commit
+        is done by database session middleware.
+
         Args:
+            db_session (DBSession): Database session of request,
             **kwargs (dict): Dict with named arguments. Keys:
                 email (str): User's email. Required.
                 role_name (str): Role name. Required.
@@ -1,24 +1,17 @@
 # Copyright 2019 by Kirill Kanin.
 # All rights reserved.
 
-import os
-import psycopg2
 from psycopg2 import sql
 from psycopg2.extras import DictCursor
-from contextlib import closing
 from aiohttp import web
-
-conn_params = {
-        'dbname': os.environ['DB_NAME'],
-        'user': os.environ['DB_USER'],
-        'password': os.environ['DB_PASSWORD'],
-        'host': os.environ['DB_HOST']
-    }
+from server.sql_pool import ConnectionPool
 
 
 class RoleModelSQL:
     """Class with static methods for working with role model via SQL.
 
+    Connections are taken from ConnectionPool.
+
     """
 
     @staticmethod
@@ -0,0 +1,114 @@
+# Copyright 2019 by Kirill Kanin.
+# All rights reserved.
+
+import os
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+from typing import Tuple, Optional
+from server.utils import SingletonMeta
+
+session_cache_size = int(os.environ['SESSION_CACHE_SIZE'])
+session_duration_hours = int(os.environ['SESSION_DURATION_HOURS'])
+
+
+class SessionCache(metaclass=SingletonMeta):
+    """Singleton class with bounded TTL cache of validated sessions.
+
+    Entry is session UUID -> (user Id, role name, expiration date). Entry is valid until expiration date of session,
+    which is never later than SESSION_DURATION_HOURS after sign in.
+
+    """
+
+    def __init__(self):
+        pass
+
+    @property
+    def hits(self) -> int:
+        """Quantity of cache hits getter.
+
+        Returns:
+            Int with quantity of cache hits.
+
+        """
+
+        pass
+
+    @property
+    def misses(self) -> int:
+        """Quantity of cache misses getter.
+
+        Returns:
+            Int with quantity of cache misses.
+
+        """
+
+        pass
+
+    @property
+    def hit_rate(self) -> float:
+        """Cache hit rate getter.
+
+        Returns:
+            Float with ratio of hits to all lookups or 0.0 if there were no lookups.
+
+        """
+
+        pass
+
+    def get(self, session_id: str) -> Optional[Tuple[int, str, datetime]]:
+        """Get cached session.
+
+        Expired entry is removed and treated as miss.
+
+        Args:
+            session_id (str): session UUID.
+
+        Returns:
+            Tuple with user Id, role name and expiration date or None if session is not cached.
+
+        """
+
+        pass
+
+    def put(self, session_id: str, user_id: int, role: str, expiration_date: datetime):
+        """Cache validated session.
+
+        The least recently used entry is evicted if cache is full.
+
+        Args:
+            session_id (str): session UUID,
+            user_id (int): User Id,
+            role (str): Role name,
+            expiration_date (datetime): Expiration date of session.
+
+        """
+
+        pass
+
+    def invalidate(self, session_id: str):
+        """Remove session from cache.
+
+        Args:
+            session_id (str): session UUID.
+
+        """
+
+        pass
+
+    def invalidate_user(self, user_id: int):
+        """Remove all sessions of user from cache.
+
+        Args:
+            user_id (int): User Id.
+
+        """
+
+        pass
+
+    def clear(self):
+        """Remove all entries from cache and reset counters.
+
+        """
+
+        pass
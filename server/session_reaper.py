@@ -0,0 +1,92 @@
+# Copyright 2019 by Kirill Kanin.
+# All rights reserved.
+
+import os
+import asyncio
+import logging
+import time
+import typing
+from aiohttp import web
+#from server.database import DataBase
+
+logger = logging.getLogger(__name__)
+
+reaper_interval = float(os.environ['SESSION_REAPER_INTERVAL'])
+reaper_batch_size = int(os.environ['SESSION_REAPER_BATCH_SIZE'])
+
+
+class SessionReaper:
+    """Periodic asyncio task, which deletes expired sessions.
+
+    Expired sessions are selected by indexed expiration date column and deleted in batches of bounded size, each batch
+    in own transaction, so table is not locked for long time. Blocking database calls are run in executor. Instance
+    is stored in app['session_reaper'] of aiohttp application, so handlers get its statistics from request.app.
+
+    """
+
+    def __init__(self, interval: float = reaper_interval, batch_size: int = reaper_batch_size):
+        pass
+
+    @property
+    def last_pass(self) -> typing.Dict[str, typing.Any]:
+        """Statistics of last pass getter.
+
+        Returns:
+            Dict, which contains statistics. Keys:
+                deleted (int): quantity of deleted sessions.
+                batches (int): quantity of batches.
+                duration (float): duration of pass in seconds.
+                finished (str): date of pass finish.
+
+        """
+
+        pass
+
+    def delete_batch(self) -> int:
+        """Delete one batch of expired sessions.
+
+        Returns:
+            Int with quantity of deleted sessions.
+
+        """
+
+        pass
+
+    async def reap(self) -> typing.Tuple[int, float]:
+        """Delete all expired sessions batch by batch and log result.
+
+        Returns:
+            Tuple with quantity of deleted sessions and duration of pass in seconds.
+
+        """
+
+        pass
+
+    async def run(self):
+        """Run passes with interval until task is cancelled.
+
+        Errors of pass are logged and do not stop task.
+
+        """
+
+        pass
+
+    async def start(self, app: web.Application):
+        """Start reaper task. Handler of app startup signal.
+
+        Args:
+            app (Application): aiohttp application.
+
+        """
+
+        pass
+
+    async def stop(self, app: web.Application):
+        """Cancel reaper task and wait for it. Handler of app cleanup signal.
+
+        Args:
+            app (Application): aiohttp application.
+
+        """
+
+        pass
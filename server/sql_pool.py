@@ -0,0 +1,128 @@
+# Copyright 2019 by Kirill Kanin.
+# All rights reserved.
+
+import os
+import time
+import psycopg2
+from threading import Condition
+from contextlib import contextmanager
+from typing import Dict, Iterator, Any
+from psycopg2.extensions import connection as Connection
+from server.utils import SingletonMeta
+
+conn_params = {
+        'dbname': os.environ['DB_NAME'],
+        'user': os.environ['DB_USER'],
+        'password': os.environ['DB_PASSWORD'],
+        'host': os.environ['DB_HOST']
+    }
+pool_min_size = int(os.environ['DB_POOL_MIN_SIZE'])
+pool_max_size = int(os.environ['DB_POOL_MAX_SIZE'])
+pool_timeout = float(os.environ['DB_POOL_TIMEOUT'])
+statement_timeout_ms = int(os.environ['DB_STATEMENT_TIMEOUT_MS'])
+
+
+class ConnectionPool(metaclass=SingletonMeta):
+    """Singleton thread safe pool of psycopg2 connections.
+
+    Pool keeps at least DB_POOL_MIN_SIZE and at most DB_POOL_MAX_SIZE connections. Each connection is opened with
+    statement timeout DB_STATEMENT_TIMEOUT_MS and checked on checkout, broken connections are replaced.
+
+    """
+
+    def __init__(self):
+        pass
+
+    def configure(
+            self, min_size: int = pool_min_size, max_size: int = pool_max_size, timeout: float = pool_timeout,
+            statement_timeout: int = statement_timeout_ms):
+        """Configure pool. Idle connections are closed and reopened with new parameters.
+
+        Args:
+            min_size (int): Min quantity of connections,
+            max_size (int): Max quantity of connections,
+            timeout (float): Max time of waiting for free connection in seconds,
+            statement_timeout (int): Statement timeout in milliseconds.
+
+        Raises:
+            AssertionError: if sizes are invalid.
+
+        """
+
+        pass
+
+    def open_connection(self) -> Connection:
+        """Open new connection with statement timeout.
+
+        Returns:
+            New database connection.
+
+        """
+
+        pass
+
+    def checkout(self) -> Connection:
+        """Take connection from pool.
+
+        Idle connection is checked with rollback and simple query, new connection is opened if there are no idle
+        connections and pool is not full. Otherwise caller waits for free connection.
+
+        Returns:
+            Healthy database connection.
+
+        Raises:
+            TimeoutError: if there is no free connection during timeout.
+
+        """
+
+        pass
+
+    def checkin(self, conn: Connection):
+        """Return connection into pool.
+
+        Open transaction is rolled back, closed connection is dropped.
+
+        Args:
+            conn (Connection): Database connection.
+
+        """
+
+        pass
+
+    @contextmanager
+    def connection(self) -> Iterator[Connection]:
+        """Context manager, which takes connection from pool and returns it back on exit.
+
+        Returns:
+            Iterator with healthy database connection.
+
+        Raises:
+            TimeoutError: if there is no free connection during timeout.
+
+        """
+
+        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics.
+
+        Returns:
+            Dict, which contains statistics. Keys:
+                size (int): quantity of open connections.
+                idle (int): quantity of idle connections.
+                in_use (int): quantity of connections in use.
+                waiting (int): quantity of callers waiting for connection.
+                checkouts (int): total quantity of checkouts.
+                wait_time_avg (float): average wait time of checkout in seconds.
+                wait_time_max (float): max wait time of checkout in seconds.
+
+        """
+
+        pass
+
+    def close(self):
+        """Close all connections.
+
+        """
+
+        pass
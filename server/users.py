@@ -4,8 +4,11 @@
 import re
 from datetime import datetime
 from aiohttp import web
+from sqlalchemy.orm.session import Session as DBSession
 #from server.database import DataBase
-from server.crypto import HashAPI
+from server.db_session import get_session, run_in_session
+from server.crypto import HashAPI, RSAKeyPool
+from server.session_cache import SessionCache
 
 
 EMAIL_REGEX = re.compile(r'[\w._%+-]+@[\w.-]+\.[A-Za-z]{2,}$')
@@ -21,6 +24,9 @@ class UsersAPI:
     def authorized(func):
         """Decorator for checking user authorization.
 
+        Validated sessions are taken from session cache, database is queried on cache miss only via database session
+        of request. User Id and role name of session are passed to decorated method in kwargs user_id and role.
+
         Args:
             func (function): Method for decoration.
 
@@ -49,10 +55,15 @@ class UsersAPI:
         pass
 
     @staticmethod
-    def signup(**kwargs):
+    def signup(db_session: DBSession, **kwargs):
         """Sign up new user.
 
+        Uniqueness of email is checked by database constraint. RSA key pair is assigned to user from key pool. Changes
+        are flushed but not committed, so IntegrityError of constraint violation is raised inside call and mapped to
+        AssertionError, commit is done by database session middleware.
+
         Args:
+            db_session (DBSession): Database session of request,
             **kwargs (dict): Dict with named arguments. Keys:
                 email (str): user's email. Required.
                 password (str): user's password. Required letters and numbers. Quantity of symbols > 8 and < 50.
@@ -63,17 +74,22 @@ class UsersAPI:
 
         Raises:
             AssertionError: if at least one of required parameters in kwargs is not set, user with set email exists,
-            email or password format is invalid, passwords are not match.
+            email or password format is invalid, passwords are not match. IntegrityError of violation of unique
+            constraint ux_user_email is mapped to AssertionError.
 
         """
 
         pass
 
     @staticmethod
-    def signin(**kwargs) -> str:
+    def signin(db_session: DBSession, **kwargs) -> str:
         """Sign in user.
 
+        Changes are flushed but not committed, so IntegrityError of constraint violation is raised inside call and
+        mapped to AssertionError, commit is done by database session middleware.
+
         Args:
+            db_session (DBSession): Database session of request,
             **kwargs (dict): Dict with named arguments. Keys:
                 email (str): user's email. Required.
                 password (str): user's password. Required.
@@ -90,10 +106,15 @@ class UsersAPI:
         pass
 
     @staticmethod
-    def logout(session_id: str):
+    def logout(db_session: DBSession, session_id: str):
         """Logout user.
 
+        Session is removed from session cache immediately. Changes are flushed but not committed, so IntegrityError of
+        constraint violation is raised inside call and mapped to AssertionError, commit is done by database session
+        middleware.
+
         Args:
+            db_session (DBSession): Database session of request,
             session_id (str): session UUID.
 
         """
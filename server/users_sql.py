@@ -3,36 +3,33 @@
 
 import re
 import os
-import psycopg2
 from psycopg2 import sql
 from psycopg2.extras import DictCursor
-from contextlib import closing
 from datetime import datetime, timedelta
 from aiohttp import web
 from uuid import uuid4
-from server.crypto import HashAPI
+from server.crypto import HashAPI, RSAKeyPool
+from server.session_cache import SessionCache
+from server.sql_pool import ConnectionPool
 
 EMAIL_REGEX = re.compile(r'[\w._%+-]+@[\w.-]+\.[A-Za-z]{2,}$')
 PASSWORD_REGEX = re.compile(r'^\w{8,50}$')
-
-conn_params = {
-        'dbname': os.environ['DB_NAME'],
-        'user': os.environ['DB_USER'],
-        'password': os.environ['DB_PASSWORD'],
-        'host': os.environ['DB_HOST']
-    }
 dt_format = os.environ['DATE_FORMAT']
 
 
 class UsersSQLAPI:
     """Class with static methods for working with users via SQL.
 
+    Connections are taken from ConnectionPool.
+
     """
 
     @staticmethod
     def authorized(func):
         """Decorator for checking user authorization.
 
+        Validated sessions are taken from session cache, database is queried on cache miss only.
+
         Args:
             func (function): Method for decoration.
 
@@ -64,6 +61,8 @@ class UsersSQLAPI:
     def signup(**kwargs):
         """Sign up new user.
 
+        Uniqueness of email is checked by database constraint. RSA key pair is assigned to user from key pool.
+
         Args:
             **kwargs (dict): Dict with named arguments. Keys:
                 email (str): user's email. Required.
@@ -75,7 +74,8 @@ class UsersSQLAPI:
 
         Raises:
             AssertionError: if at least one of required parameters in kwargs is not set, user with set email exists,
-            email or password format is invalid, passwords are not match.
+            email or password format is invalid, passwords are not match. psycopg2 UniqueViolation of unique constraint
+            ux_user_email is mapped to AssertionError.
 
         """
 
@@ -105,6 +105,8 @@ class UsersSQLAPI:
     def logout(session_id: str):
         """Logout user.
 
+        Session is removed from session cache immediately.
+
         Args:
             session_id (str): session UUID.
 
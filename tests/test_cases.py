@@ -62,6 +62,12 @@ class TestSuite:
     async def test_get_files(self, client, prepare_data):
         pass
 
+    async def test_get_files_paginated(self, client, prepare_data):
+        pass
+
+    async def test_get_files_stream(self, client, prepare_data):
+        pass
+
     async def test_get_file_info(self, client, prepare_data):
         pass
 
@@ -71,12 +77,42 @@ class TestSuite:
     async def test_delete_file(self, client, prepare_data):
         pass
 
+    async def test_batch_files(self, client, prepare_data):
+        pass
+
     async def test_download_file(self, client, prepare_data):
         pass
 
     async def test_download_file_queued(self, client, prepare_data):
         pass
 
+    async def test_download_file_queued_full(self, client, prepare_data):
+        pass
+
+    async def test_get_download_status(self, client, prepare_data):
+        pass
+
+    async def test_wait_download_status(self, client, prepare_data):
+        pass
+
+    async def test_get_file_content(self, client, prepare_data):
+        pass
+
+    async def test_get_file_content_range(self, client, prepare_data):
+        pass
+
+    async def test_scrub_files(self, client, prepare_data):
+        pass
+
+    async def test_get_scrub_report(self, client, prepare_data):
+        pass
+
+    async def test_get_storage_stats(self, client, prepare_data):
+        pass
+
+    async def test_get_metrics(self, client, prepare_data):
+        pass
+
     async def test_signup(self, client, prepare_data):
         pass
 